@@ -1,5 +1,9 @@
+import copy
 import math
-import numpy as np
+from dependencies import Dependencies
+
+# 惰性导入：只用标量接口时不加载numpy
+np=Dependencies.get_numpy()
 
 class Aging:
     def __init__(self,battery_type='Lipo'):
@@ -7,6 +11,8 @@ class Aging:
         self.AGING_PARAMS={'Lipo': {  # 锂聚合物电池（手机常用）
                 'cycle_life': 500,  # 循环寿命（80%容量保持）
                 'calendar_life': 5,  # 日历寿命（年，25°C下）
+                'calendar_fade': 0.05,  # 基准日历老化率（每年，25°C，50% SOC）
+                'Ea': 50000,         # 日历老化活化能(J/mol)
                 'T_ref': 298.15,     # 参考温度(K)
                 'Q10_temp': 2.0,     # 温度系数（每升高10°C老化加倍）
                 'stress_SOC_high': 0.9,   # 高SOC应力阈值
@@ -17,6 +23,8 @@ class Aging:
                            'LiFePO4': {  # 磷酸铁锂
                 'cycle_life': 2000,
                 'calendar_life': 10,
+                'calendar_fade': 0.05,
+                'Ea': 50000,
                 'T_ref': 298.15,
                 'Q10_temp': 1.8,
                 'stress_SOC_high': 0.95,
@@ -28,7 +36,17 @@ class Aging:
         
         self.params = self.AGING_PARAMS.get(battery_type, self.AGING_PARAMS['Lipo'])
         
-    def capacity_degradation(self, age_days, cycles_completed, avg_SOC, avg_temp, DOD_avg):
+    def with_params(self, **overrides):
+        """
+        覆盖部分老化参数后的副本，如with_params(cycle_life=np.array([...]))
+        值可为数组，数组接口按广播规则逐元素使用（蒙特卡洛采样）
+        """
+        model = copy.copy(self)
+        model.params = dict(self.params, **overrides)
+        return model
+
+    def capacity_degradation(self, age_days, cycles_completed, avg_SOC, avg_temp, DOD_avg,
+                             dod_histogram=None):
         """
         综合计算电池容量衰减
         参数:
@@ -37,6 +55,8 @@ class Aging:
             avg_SOC: 平均SOC（0-1）
             avg_temp: 平均温度(K)
             DOD_avg: 平均放电深度（0-1）
+            dod_histogram: 可选，雨流计数的DOD直方图{'dod': [...], 'counts': [...]}，
+                           给出时按DOD分箱计算循环衰减，忽略cycles_completed/DOD_avg
         返回:
             容量保持率（0-1）
         """
@@ -44,7 +64,11 @@ class Aging:
         calendar_loss = self.calendar_aging(age_days, avg_SOC, avg_temp)
         
         # 2. 循环衰减（充放电相关）
-        cycle_loss = self.cycle_aging(cycles_completed, DOD_avg, avg_temp)
+        if dod_histogram is not None:
+            cycle_loss = float(self.cycle_aging_histogram(
+                dod_histogram['dod'], dod_histogram['counts'], avg_temp))
+        else:
+            cycle_loss = self.cycle_aging(cycles_completed, DOD_avg, avg_temp)
         
         # 3. 总容量保持率（相乘模型）
         total_retention = (1 - calendar_loss) * (1 - cycle_loss)
@@ -58,7 +82,7 @@ class Aging:
         公式：Q_loss = A * t^n * exp(-Ea/RT) * f(SOC)
         """
         # 基准老化率（每年衰减百分比，25°C，50% SOC）
-        base_rate_per_year = 0.05  # 5%/年
+        base_rate_per_year = self.params['calendar_fade']  # 5%/年
         
         # 转换为天数
         base_rate_per_day = 1 - (1 - base_rate_per_year) ** (1/365)
@@ -67,7 +91,7 @@ class Aging:
         time_exponent = 0.7
         
         # 温度加速因子（阿伦尼乌斯方程）
-        Ea = 50000  # 活化能(J/mol)
+        Ea = self.params['Ea']  # 活化能(J/mol)
         R = 8.314   # 气体常数
         
         T_ref = self.params['T_ref']
@@ -179,3 +203,189 @@ class Aging:
         
         return max(30, remaining)  # 最少30天
 
+
+    # ---- 数组版本：参数可为numpy数组（按广播规则），结果与标量版本逐元素一致 ----
+
+    CALENDAR_EXPONENT = 0.7   # 日历老化时间指数（同calendar_aging）
+    CYCLE_EXPONENT = 0.8      # 循环老化指数（同cycle_aging）
+
+    def capacity_degradation_array(self, age_days, cycles_completed, avg_SOC, avg_temp, DOD_avg,
+                                   dod_histogram=None):
+        """容量保持率（数组版），dod_histogram同capacity_degradation"""
+        calendar_loss = self.calendar_aging_array(age_days, avg_SOC, avg_temp)
+        if dod_histogram is not None:
+            cycle_loss = self.cycle_aging_histogram(dod_histogram['dod'], dod_histogram['counts'],
+                                                    avg_temp)
+        else:
+            cycle_loss = self.cycle_aging_array(cycles_completed, DOD_avg, avg_temp)
+        return np.clip((1 - calendar_loss) * (1 - cycle_loss), 0.0, 1.0)
+
+    def calendar_rate(self, avg_SOC, avg_temp):
+        """日历老化的日损失率k（数组版）：基准日损失率 × 温度加速 × SOC应力"""
+        avg_SOC = np.asarray(avg_SOC, dtype=float)
+        avg_temp = np.asarray(avg_temp, dtype=float)
+
+        base_rate_per_day = 1 - (1 - np.asarray(self.params['calendar_fade'])) ** (1/365)
+        Ea = np.asarray(self.params['Ea'])
+        R = 8.314
+
+        safe_temp = np.where(avg_temp > 0, avg_temp, self.params['T_ref'])
+        temp_acceleration = np.exp(Ea/R * (1/self.params['T_ref'] - 1/safe_temp))
+
+        soc_stress = np.select(
+            [avg_SOC > self.params['stress_SOC_high'], avg_SOC < self.params['stress_SOC_low']],
+            [1.5, 1.3],
+            1.0 + 2.0 * np.abs(avg_SOC - 0.5)
+        )
+        return base_rate_per_day * temp_acceleration * soc_stress
+
+    def calendar_aging_array(self, age_days, avg_SOC, avg_temp):
+        """日历老化（数组版）"""
+        age_days = np.asarray(age_days, dtype=float)
+        loss = 1 - (1 - self.calendar_rate(avg_SOC, avg_temp)) ** (age_days ** self.CALENDAR_EXPONENT)
+        return np.minimum(0.5, loss)
+
+    def cycle_stress(self, DOD_avg, avg_temp):
+        """循环老化的应力系数S = DOD应力 × 温度因子 × 20%（数组版）"""
+        DOD_avg = np.asarray(DOD_avg, dtype=float)
+        avg_temp = np.asarray(avg_temp, dtype=float)
+        DOD_stress = np.select([DOD_avg > 0.8, DOD_avg > 0.5], [2.0, 1.5], 0.7 + DOD_avg * 0.6)
+        temp_factor = np.select(
+            [avg_temp > self.params['stress_temp_high'], avg_temp < self.params['stress_temp_low']],
+            [2.0, 1.5],
+            1.0
+        )
+        return DOD_stress * temp_factor * 0.2
+
+    def cycle_aging_array(self, cycles_completed, DOD_avg, avg_temp):
+        """循环老化（数组版）"""
+        effective_cycles = np.asarray(cycles_completed, dtype=float) * np.sqrt(DOD_avg)
+        loss_rate = (effective_cycles / self.params['cycle_life']) ** self.CYCLE_EXPONENT
+        return np.minimum(0.3, loss_rate * self.cycle_stress(DOD_avg, avg_temp))
+
+    def cycle_aging_histogram(self, dod, counts, avg_temp):
+        """
+        按DOD分箱的循环老化
+        单一DOD时 L = (N·√DOD/N_80)^m·S(DOD)，故各箱折算为等效循环 N_i·√DOD_i·S_i^(1/m) 后求和，
+        只有一个箱时与cycle_aging完全一致
+        dod, counts: 箱中心与循环数，沿最后一维求和
+        """
+        dod = np.asarray(dod, dtype=float)
+        counts = np.asarray(counts, dtype=float)
+        m = self.CYCLE_EXPONENT
+        T = np.asarray(avg_temp, dtype=float)[..., None]
+        effective = (counts * np.sqrt(dod) * self.cycle_stress(dod, T) ** (1 / m)).sum(axis=-1)
+        return np.minimum(0.3, (effective / self.params['cycle_life']) ** m)
+
+    # 使用模式字段及缺省值（与stress_score中的get默认值一致）
+    USAGE_FIELDS = (('avg_temp', 298.0), ('avg_dod', 0.5), ('storage_soc', 0.5),
+                    ('fast_charge_ratio', 0.0), ('low_temp_charge', False))
+
+    @classmethod
+    def usage_columns(cls, usage_patterns):
+        """
+        把使用模式统一为列字典{字段: 数组}
+        usage_patterns: 结构化数组、列字典或字典列表；缺失字段取缺省值
+        """
+        if isinstance(usage_patterns, np.ndarray) and usage_patterns.dtype.names:
+            names = usage_patterns.dtype.names
+            get = lambda name, default: (usage_patterns[name] if name in names
+                                         else np.full(usage_patterns.shape, default))
+        elif isinstance(usage_patterns, dict):
+            shape = np.shape(next(iter(usage_patterns.values()), ()))
+            get = lambda name, default: usage_patterns.get(name, np.full(shape, default))
+        else:
+            get = lambda name, default: [p.get(name, default) for p in usage_patterns]
+        return {name: np.asarray(get(name, default)).astype(type(default))
+                for name, default in cls.USAGE_FIELDS}
+
+    def stress_score_array(self, usage_patterns):
+        """电池压力评分（数组版）"""
+        u = self.usage_columns(usage_patterns)
+        score = np.select([u['avg_temp'] > 313, u['avg_temp'] > 303], [30, 15], 0)
+        score = score + np.select([u['avg_dod'] > 0.8, u['avg_dod'] > 0.6], [25, 15], 0)
+        score = score + 20 * (u['storage_soc'] > 0.9)
+        score = score + 15 * (u['fast_charge_ratio'] > 0.7)
+        score = score + 10 * u['low_temp_charge']
+        return np.minimum(100, score)
+
+    def estimate_remaining_life_array(self, current_retention, usage_patterns):
+        """剩余寿命估算（数组版，天）"""
+        current_retention = np.asarray(current_retention, dtype=float)
+        stress = self.stress_score_array(usage_patterns)
+        remaining = np.select(
+            [current_retention > 0.8, current_retention > 0.7, current_retention > 0.6],
+            [365 * 2, 365 * 1, 180],
+            90
+        )
+        return np.maximum(30, remaining * (1 - stress/200))
+
+
+class AgingSimulator:
+    """
+    逐日推进的老化状态
+    日历损失 L = 1-(1-k)^(t^n) 等价于 -ln(1-L) = t^n·(-ln(1-k))；循环损失 L_c = (E/N_80)^m·S。
+    条件变化时按当天的k、S反推等效天数/等效循环数再前进（等效时间法），
+    条件不变时与capacity_degradation的闭式结果一致。每步O(1)，状态可为数组（多台设备）
+    """
+
+    def __init__(self, battery_type='Lipo', age_days=0.0, cycles_completed=0.0,
+                 calendar_index=0.0, cycle_loss=0.0):
+        self.battery_type = battery_type
+        self.model = Aging(battery_type)
+        self.age_days = np.asarray(age_days, dtype=float)
+        self.cycles_completed = np.asarray(cycles_completed, dtype=float)
+        self.calendar_index = np.asarray(calendar_index, dtype=float)   # -ln(1-L_cal)，未截断
+        self.cycle_loss = np.asarray(cycle_loss, dtype=float)           # L_c，未截断
+
+    @classmethod
+    def from_history(cls, history, battery_type='Lipo'):
+        """由usage_history（累计值与平均条件）初始化状态"""
+        sim = cls(battery_type, history['age_days'], history['cycles_completed'])
+        model = sim.model
+        k = model.calendar_rate(history['avg_SOC'], history['avg_temp'])
+        sim.calendar_index = sim.age_days ** Aging.CALENDAR_EXPONENT * -np.log1p(-k)
+        effective = sim.cycles_completed * np.sqrt(history['DOD_avg'])
+        sim.cycle_loss = ((effective / model.params['cycle_life']) ** Aging.CYCLE_EXPONENT
+                          * model.cycle_stress(history['DOD_avg'], history['avg_temp']))
+        return sim
+
+    def step(self, cycles=0.0, avg_SOC=0.5, avg_temp=298.15, DOD_avg=0.5, days=1):
+        """按days天内的使用增量推进状态（参数可为数组）"""
+        model = self.model
+        n = Aging.CALENDAR_EXPONENT
+        c = -np.log1p(-model.calendar_rate(avg_SOC, avg_temp))
+        t_eq = (self.calendar_index / c) ** (1 / n)
+        self.calendar_index = (t_eq + days) ** n * c
+
+        m = Aging.CYCLE_EXPONENT
+        N_80 = model.params['cycle_life']
+        S = model.cycle_stress(DOD_avg, avg_temp)
+        E_eq = N_80 * (self.cycle_loss / S) ** (1 / m)
+        E = E_eq + np.asarray(cycles, dtype=float) * np.sqrt(DOD_avg)
+        self.cycle_loss = (E / N_80) ** m * S
+
+        self.age_days = self.age_days + days
+        self.cycles_completed = self.cycles_completed + cycles
+        return self.retention
+
+    @property
+    def retention(self):
+        calendar_loss = np.minimum(0.5, -np.expm1(-self.calendar_index))
+        cycle_loss = np.minimum(0.3, self.cycle_loss)
+        return np.clip((1 - calendar_loss) * (1 - cycle_loss), 0.0, 1.0)
+
+    def to_dict(self):
+        """检查点：可直接json.dump"""
+        return {
+            'battery_type': self.battery_type,
+            'age_days': self.age_days.tolist(),
+            'cycles_completed': self.cycles_completed.tolist(),
+            'calendar_index': self.calendar_index.tolist(),
+            'cycle_loss': self.cycle_loss.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['battery_type'], state['age_days'], state['cycles_completed'],
+                   state['calendar_index'], state['cycle_loss'])
@@ -0,0 +1,135 @@
+# 单台设备的标量放电模型（开路电压、场景功率、有效容量、SOC时间序列），导入时无副作用
+from parameters import PhoneParameterEstimator
+from agingsystem import Aging
+import math
+import numpy as np
+import ocvcurve
+import profiling
+from thermal import thermal_step
+
+usage_history = {
+    'age_days': 365,        
+    'cycles_completed': 200,
+    'avg_SOC': 0.6,         
+    'avg_temp': 303.15,     
+    'DOD_avg': 0.7,         
+    'usage_pattern': {
+        'avg_temp': 303.15,
+        'avg_dod': 0.7,
+        'storage_soc': 0.8,
+        'fast_charge_ratio': 0.5,
+        'low_temp_charge': False
+    }
+}
+specs={
+    'name': 'iPhone 14 Pro',
+    'screen': {'type': 'OLED', 'size': 6.1, 'max_brightness': 2000},
+    'chip': {'name': 'A16'},
+    'network': {'type': '5G_SA', 'max_bandwidth': 1000},
+    'cooling': 'passive_advanced',
+    'os': 'iOS',
+    'battery': {'capacity': 3200, 'chemistry': 'Lipo'},
+    'history':usage_history
+}
+total_Capacity=specs['battery']['capacity']
+
+aging_model=Aging(battery_type=specs['battery']['chemistry'])
+                  
+def voltage(SOC):
+    SOC_pct = SOC / 100.0
+    
+    if SOC_pct <= 0:
+        return 3.0
+    
+    if SOC_pct >= 0.95:
+        x = SOC_pct - 0.95
+        return 4.05 + 0.15 * (1 - 5*x)
+    elif SOC_pct >= 0.2:
+        return 3.70 + 0.35 * (SOC_pct - 0.2) / 0.75
+    elif SOC_pct >= 0.1:
+        return 3.50 + 0.20 * (SOC_pct - 0.1) / 0.1
+    else:
+        return 3.00 + 0.50 * (SOC_pct / 0.1)
+    
+def power_scene(scene,params):
+    p_total=0
+    P_s=params['baseline']['P_s']
+    P_c=params['baseline']['P_c'][scene]
+    P_n=params['baseline']['P_n']
+    for e in ['s','n','g','b']:
+        p_single='P_'+e
+        power=params['coefficients'][scene][e]*params['baseline'][p_single]
+        p_total+=power
+    p_total+=params['coefficients'][scene]['c']*P_c
+    p_total*=(1+params['coupling'][scene])
+    return p_total
+    
+def C_eff(SOC,T,spec,C_0=total_Capacity):
+    def degradation(spec):
+        history=spec['history']
+        retention = aging_model.capacity_degradation(
+        age_days=history['age_days'],
+        cycles_completed=history['cycles_completed'],
+        avg_SOC=history['avg_SOC'],
+        avg_temp=history['avg_temp'],
+        DOD_avg=history['DOD_avg']
+    )
+        return retention
+    def f_T(T):
+        T_0=298.15
+        T_c=278.15
+        delta_T=4
+        alpha_T=0.001
+        r=(1-alpha_T*(T-T_0)**2)/(1+math.exp(-(T-T_c)/(delta_T))) if T<T_0 else 1
+        return r
+    def f_SOC(SOC):
+        # ∫V ds 由ocvcurve的累积能量表精确给出，不再逐步调用quad
+        return ocvcurve.f_SOC(SOC)
+    
+    stats=profiling.active()
+    if stats: stats.mark()
+    retention=degradation(spec)
+    if stats: stats.lap('degradation')
+    C=C_0*f_T(T)*f_SOC(SOC)
+    if stats: stats.lap('capacity_integral')
+    return C*retention
+
+def SOC(t:float,dt:float=600,SOC_0:float=100,T:float=298.15,scene='B',spec=specs,dtype=None,every:int=1,thermal:bool=False):
+    # dtype不为None时返回该类型的numpy数组（如np.float32），否则返回列表；every>1时每every步记录一个点
+    # thermal=True时T为环境温度，机身温度按集总热模型随功率变化，并反馈到f_T和热耦合功率
+    if isinstance(every,bool) or not isinstance(every,(int,np.integer)) or every<1:
+        raise ValueError(f"every must be a positive integer, got {every!r}")
+    stats=profiling.active()
+    if stats: stats.mark()
+    params=PhoneParameterEstimator(spec).estimate_all_parameters()
+    if stats: stats.lap('estimate')
+    n_steps=int(t/dt)+1
+    soc_values=[SOC_0]
+    def I(SOC,scene='B'):
+        P_total=power_scene(scene,params)
+        V=voltage(SOC)
+        return 1000*P_total/V
+
+    T_dev=T
+    if thermal:
+        coupling=params['coupling'][scene]
+        P_base=power_scene(scene,params)/(1+coupling)
+    SOC_curr=SOC_0
+    for i in range(1,n_steps):
+        t_curr=dt*i
+        if thermal:
+            T_dev,P_total=thermal_step(T_dev,T,P_base,coupling,params['thermal']['R_th'],params['thermal']['C_th'],dt)
+            if stats: stats.lap('thermal')
+        C_eff_mAh=C_eff(SOC_curr,T_dev,spec,C_0=3200)
+
+        I_mA=1000*P_total/voltage(SOC_curr) if thermal else I(SOC_curr,scene)
+        if stats: stats.lap('current')
+
+        dSOC=-100*(I_mA*dt/3600)/C_eff_mAh
+
+        soc_new=SOC_curr+dSOC
+        SOC_curr=max(0,min(100,soc_new))
+        if i%every==0:
+            soc_values.append(SOC_curr)
+        if stats: stats.lap('step')
+    return soc_values if dtype is None else np.asarray(soc_values,dtype=dtype)
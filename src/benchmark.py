@@ -0,0 +1,290 @@
+import argparse
+import copy
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from batterymodel import specs, SOC, C_eff, power_scene
+from agingsystem import Aging
+from parameters import PhoneParameterEstimator
+from pinformation import PInformation
+from pcalculator import solve_power_from_runtime, calibrate_powers
+from discharge import DischargeModel, FleetDischarge, SCENES, C_eff_array, power_scene_array
+
+# 导入耗时预算（毫秒）：工作进程与只用老化/参数模型的调用方依赖这些模块的快速导入
+IMPORT_BUDGET_MS = {'agingsystem': 50, 'parameters': 50}
+
+SAMPLE_SPEC = specs
+
+
+def _timed(func, repeat):
+    """返回(最后一次结果, 平均耗时秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def bench_integrators(spec=SAMPLE_SPEC, scenes=SCENES, dts=(600, 300, 60, 10),
+                      rtols=(1e-3, 1e-6), repeat=5, threshold=1):
+    """
+    Euler、自适应积分与查表直接求解的精度/耗时对比
+    参考值为rtol=1e-10的自适应解；积分时长取查表续航的两倍，保证各方法都能放空，
+    查表续航为inf（功率为0）的场景跳过
+    返回:
+        记录列表，每条含scene、method、setting、runtime_h、error_min、seconds
+    """
+    model = DischargeModel(spec)
+    records = []
+    for scene in scenes:
+        hours = float(model.time_to_empty(scene, threshold=threshold))
+        if not np.isfinite(hours):
+            continue
+        t = 2 * hours * 3600
+        ref = model.solve(scene, t, threshold=threshold, rtol=1e-10, atol=1e-12).t_empty / 3600
+        for dt in dts:
+            hours, sec = _timed(lambda: model.runtime(scene, t, dt=dt, threshold=threshold,
+                                                      method='euler'), repeat)
+            records.append({'scene': scene, 'method': 'euler', 'setting': f"dt={dt}",
+                            'runtime_h': hours, 'error_min': (hours - ref) * 60, 'seconds': sec})
+        for rtol in rtols:
+            sol, sec = _timed(lambda: model.solve(scene, t, threshold=threshold, rtol=rtol),
+                              repeat)
+            hours = sol.t_empty / 3600
+            records.append({'scene': scene, 'method': 'adaptive',
+                            'setting': f"rtol={rtol:g} nfev={sol.nfev}",
+                            'runtime_h': hours, 'error_min': (hours - ref) * 60, 'seconds': sec})
+        hours, sec = _timed(lambda: float(model.time_to_empty(scene, threshold=threshold)), repeat)
+        records.append({'scene': scene, 'method': 'quadrature', 'setting': 'table',
+                        'runtime_h': hours, 'error_min': (hours - ref) * 60, 'seconds': sec})
+    return records
+
+
+def print_records(records):
+    print(f"{'scene':<6}{'method':<12}{'setting':<22}{'runtime_h':>10}{'error_min':>11}{'ms':>9}")
+    for r in records:
+        print(f"{r['scene']:<6}{r['method']:<12}{r['setting']:<22}"
+              f"{r['runtime_h']:>10.4f}{r['error_min']:>11.3f}{r['seconds'] * 1000:>9.3f}")
+
+
+def import_time_ms(module, repeat=3):
+    """在全新解释器中测量导入某模块的耗时（毫秒），取多次中的最小值"""
+    code = (f"import time; t = time.perf_counter(); import {module}; "
+            f"print((time.perf_counter() - t) * 1000)")
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                             check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(float(out.stdout))
+    return min(times)
+
+
+def check_import_budget(budget=IMPORT_BUDGET_MS):
+    """
+    检查导入耗时是否在预算内
+    返回:
+        {模块: (耗时ms, 预算ms, 是否通过)}
+    """
+    results = {}
+    for module, limit in budget.items():
+        ms = import_time_ms(module)
+        results[module] = (ms, limit, ms <= limit)
+    return results
+
+
+# ---- 回归基准套件 ----
+
+DEFAULT_SCALES = (1, 1000, 100000)
+# 单次基准中轨迹数组元素数上限（设备数×步数），超过则跳过以免耗尽内存
+MAX_TRAJECTORY_ELEMENTS = 2 * 10 ** 7
+# 批量标定的最大手机数（lsmr迭代次数随规模增长，10万台需数分钟）
+MAX_CALIBRATION_SIZE = 10 ** 4
+
+
+def make_specs(n):
+    """生成n个不同的设备规格（芯片/网络/系统/屏幕尺寸轮换）"""
+    PIn = PInformation(specs)
+    grid = itertools.cycle(itertools.product(PIn.SOC_POWER_PROFILES, PIn.NETWORK_POWER,
+                                             PIn.OS_FACTOR, (5.8, 6.1, 6.7)))
+    out = []
+    for chip, network, os_name, size in itertools.islice(grid, n):
+        spec = copy.deepcopy(specs)
+        spec['chip']['name'] = chip
+        spec['network']['type'] = network
+        spec['os'] = os_name
+        spec['screen']['size'] = size
+        out.append(spec)
+    return out
+
+
+def _case_soc(dt, hours):
+    def setup(n):
+        if n == 1:
+            return lambda: SOC(t=hours * 3600, dt=dt, scene='B')
+        if n * (int(hours * 3600 / dt) + 1) > MAX_TRAJECTORY_ELEMENTS:
+            return None
+        fleet = FleetDischarge(make_specs(n), scenes=('B',))
+        return lambda: fleet.simulate(hours * 3600, dt)
+    return setup
+
+
+def _case_C_eff(n):
+    if n == 1:
+        return lambda: C_eff(50, 298.15, specs)
+    soc = np.linspace(1, 100, n)
+    retention = np.full(n, 0.86)
+    return lambda: C_eff_array(soc, 298.15, retention, 3200)
+
+
+def _case_power_scene(n):
+    params = [PhoneParameterEstimator(s).estimate_all_parameters() for s in make_specs(min(n, 1000))]
+    if n == 1:
+        return lambda: power_scene('B', params[0])
+    params = list(itertools.islice(itertools.cycle(params), n))
+    return lambda: power_scene_array(SCENES, params)
+
+
+def _case_capacity_degradation(n):
+    aging_model = Aging('Lipo')
+    if n == 1:
+        return lambda: aging_model.capacity_degradation(365, 200, 0.6, 303.15, 0.7)
+    rng = np.random.default_rng(0)
+    age, cycles = rng.uniform(0, 1500, n), rng.uniform(0, 1000, n)
+    soc, temp, dod = rng.uniform(0, 1, n), rng.uniform(280, 320, n), rng.uniform(0.1, 1, n)
+    return lambda: aging_model.capacity_degradation_array(age, cycles, soc, temp, dod)
+
+
+def _case_get_c(n):
+    if n == 1:
+        PIn = PInformation(specs)
+        return lambda: PIn.get_c('light')
+    names = [s['chip']['name'] for s in itertools.islice(itertools.cycle(make_specs(1000)), n)]
+    return lambda: PInformation.get_c_array(names, 'light')
+
+
+def _case_estimate_all_parameters(n):
+    devices = make_specs(min(n, 1000))
+    if n > 1000:
+        # 大规模下走带缓存的路径（真实服务中规格高度重复）；每次计时前清空缓存，
+        # 计入首次估算的冷缓存开销，而不是只测重复命中
+        devices = list(itertools.islice(itertools.cycle(devices), n))
+
+        def run():
+            PhoneParameterEstimator.cache_clear()
+            return [PhoneParameterEstimator.cached(s) for s in devices]
+        return run
+    return lambda: [PhoneParameterEstimator(s).estimate_all_parameters() for s in devices]
+
+
+def _case_solve_power_from_runtime(n):
+    if n > MAX_CALIBRATION_SIZE:
+        return None
+    rng = np.random.default_rng(0)
+    runtimes = rng.uniform([8, 5, 3, 5], [16, 12, 7, 12], (n, 4))
+    if n == 1:
+        return lambda: solve_power_from_runtime(*runtimes[0], battery_capacity=3200,
+                                                voltage_avg=3.85)
+    capacity = rng.uniform(3000, 5000, n)
+    return lambda: calibrate_powers(runtimes, capacity, 3.85)
+
+
+def _case_runtime(n):
+    fleet = FleetDischarge(make_specs(n))
+    return lambda: fleet.runtime()
+
+
+# 名称 → setup(n)，setup返回被计时的无参函数，返回None表示该规模下跳过
+BENCHMARKS = {
+    'SOC[dt=600,h=5]': _case_soc(600, 5),
+    'SOC[dt=300,h=15]': _case_soc(300, 15),
+    'SOC[dt=60,h=15]': _case_soc(60, 15),
+    'C_eff': _case_C_eff,
+    'power_scene': _case_power_scene,
+    'capacity_degradation': _case_capacity_degradation,
+    'get_c': _case_get_c,
+    'estimate_all_parameters': _case_estimate_all_parameters,
+    'solve_power_from_runtime': _case_solve_power_from_runtime,
+    'runtime': _case_runtime,
+}
+
+
+def run_benchmarks(names=None, scales=DEFAULT_SCALES, repeat=3, log=None):
+    """
+    运行基准，每项取repeat次中的最短耗时
+    返回:
+        {'meta': 环境信息, 'results': {'名称@规模': 秒}}
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        for n in scales:
+            func = BENCHMARKS[name](n)
+            if func is None:
+                continue
+            best = min(_timed(func, 1)[1] for _ in range(repeat))
+            results[f"{name}@{n}"] = best
+            if log:
+                log(f"{name}@{n}: {best * 1000:.3f} ms")
+    meta = {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare_benchmarks(baseline, current, threshold=0.2):
+    """
+    比较两次基准结果，current比baseline慢超过threshold（比例）的记为回退
+    返回:
+        [(键, 基准秒, 当前秒, 比值, 是否回退)]
+    """
+    rows = []
+    for key, base in baseline['results'].items():
+        if key not in current['results']:
+            continue
+        now = current['results'][key]
+        ratio = now / base if base > 0 else float('inf')
+        rows.append((key, base, now, ratio, ratio > 1 + threshold))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='性能基准')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_run = sub.add_parser('run', help='运行基准套件并保存JSON结果')
+    p_run.add_argument('--out', help='结果JSON文件（不给则只打印）')
+    p_run.add_argument('--cases', help='逗号分隔的基准名，默认全部')
+    p_run.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)))
+    p_run.add_argument('--repeat', type=int, default=3)
+    p_cmp = sub.add_parser('compare', help='与基线比较，出现回退时返回非零')
+    p_cmp.add_argument('baseline')
+    p_cmp.add_argument('current')
+    p_cmp.add_argument('--threshold', type=float, default=0.2, help='允许的变慢比例')
+    sub.add_parser('integrators', help='Euler/自适应/查表续航求解的精度与耗时对比')
+    sub.add_parser('imports', help='检查模块导入耗时预算')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        report = run_benchmarks(args.cases.split(',') if args.cases else None,
+                                [int(s) for s in args.scales.split(',')], args.repeat, log=print)
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    elif args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        rows = compare_benchmarks(baseline, current, args.threshold)
+        for key, base, now, ratio, slower in rows:
+            print(f"{key:<40}{base * 1000:>12.3f}{now * 1000:>12.3f} ms{ratio:>8.2f}x"
+                  f"{'  SLOWER' if slower else ''}")
+        sys.exit(1 if any(r[-1] for r in rows) else 0)
+    elif args.command == 'integrators':
+        print_records(bench_integrators())
+    elif args.command == 'imports':
+        results = check_import_budget()
+        for module, (ms, limit, ok) in results.items():
+            print(f"{module:<14}{ms:>8.1f} ms  (预算 {limit} ms)  {'OK' if ok else 'SLOW'}")
+        sys.exit(0 if all(ok for _, _, ok in results.values()) else 1)
@@ -0,0 +1,118 @@
+import csv
+import hashlib
+import os
+from types import MappingProxyType
+from dependencies import Dependencies
+
+# 惰性导入：构造PInformation时才加载numpy
+np=Dependencies.get_numpy()
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# 表名 → (文件名, 键列, [(列名, 类型)])
+# chips: 各SoC典型场景功耗(W)
+#   base基础待机 / idle轻度待机 / light轻度使用 / medium中等负载 / heavy重度使用 / peak峰值
+# networks: 各网络制式高速传输功耗(W)
+# os: 系统后台功耗因子
+TABLES = {
+    'chips': ('chips.csv', 'name', [('name', 'U32'), ('base', 'f8'), ('idle', 'f8'),
+                                    ('light', 'f8'), ('medium', 'f8'), ('heavy', 'f8'),
+                                    ('peak', 'f8'), ('year', 'i4'), ('process', 'U8')]),
+    'networks': ('networks.csv', 'type', [('type', 'U16'), ('power', 'f8')]),
+    'os': ('os.csv', 'os', [('os', 'U32'), ('factor', 'f8')]),
+}
+
+
+def _read_table(path, fields):
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    return np.array([tuple(row[name] for name, _ in fields) for row in rows], dtype=fields)
+
+
+class Catalog:
+    """
+    设备档案目录：每张表一个NumPy结构化数组 + 键→行号索引
+    批量查询按名称一次gather；嵌套字典视图供原有的逐台接口使用
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        # 内容指纹：数据文件改动后，磁盘结果缓存等按它区分新旧结果
+        digest = hashlib.sha1()
+        for name in sorted(tables):
+            digest.update(name.encode('utf-8'))
+            digest.update(repr(tables[name].dtype.descr).encode('utf-8'))
+            digest.update(tables[name].tobytes())
+        self.fingerprint = digest.hexdigest()
+        self.index = {name: {key: i for i, key in enumerate(table[TABLES[name][1]].tolist())}
+                      for name, table in tables.items()}
+        # 只读视图，所有PInformation实例共享
+        chips = tables['chips']
+        columns = chips.dtype.names[1:]
+        self.chip_profiles = MappingProxyType({
+            row[0]: MappingProxyType(dict(zip(columns, row[1:]))) for row in chips.tolist()})
+        self.network_power = MappingProxyType(
+            dict(zip(tables['networks']['type'].tolist(), tables['networks']['power'].tolist())))
+        self.os_factor = MappingProxyType(
+            dict(zip(tables['os']['os'].tolist(), tables['os']['factor'].tolist())))
+
+    @classmethod
+    def from_directory(cls, directory=CATALOG_DIR):
+        return cls({name: _read_table(os.path.join(directory, filename), fields)
+                    for name, (filename, _, fields) in TABLES.items()})
+
+    def rows(self, table, keys):
+        """键 → 行号数组（形状同keys），未知键为-1"""
+        shape = np.shape(keys)
+        if isinstance(keys, np.ndarray):
+            keys = keys.ravel().tolist()
+        elif shape:
+            keys = np.ravel(np.asarray(keys, dtype=object)).tolist()
+        else:
+            keys = [keys]
+        index = self.index[table]
+        rows = np.fromiter((index.get(k, -1) for k in keys), dtype=np.intp, count=len(keys))
+        return rows.reshape(shape)
+
+    def lookup(self, table, keys, column, default=None):
+        """
+        批量取值：column为列名时返回keys形状的数组，为列名序列时最后一维按列排列
+        default为None时未知键抛出KeyError，否则以default填充
+        """
+        rows = self.rows(table, keys)
+        data = self.tables[table]
+        if isinstance(column, str):
+            values = data[column]
+        else:
+            values = np.stack([data[c] for c in column], axis=-1)
+        missing = rows < 0
+        if missing.any():
+            if default is None:
+                unknown = sorted(set(np.asarray(keys)[missing].tolist()))
+                raise KeyError(f"Unknown {table} entries: {unknown}")
+            values = np.concatenate([values, np.full((1,) + values.shape[1:], default,
+                                                     dtype=values.dtype)])
+        return values[rows]
+
+
+_CATALOG = None
+
+
+def get_catalog():
+    """进程内共享的目录，首次使用时从CATALOG_DIR加载"""
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = Catalog.from_directory()
+    return _CATALOG
+
+
+def use_catalog(directory):
+    """
+    改用其它目录下的数据文件（需在构造PInformation之前调用）
+    进程内缓存的参数估算结果随之清空
+    """
+    global _CATALOG
+    from parameters import PhoneParameterEstimator
+    _CATALOG = Catalog.from_directory(directory)
+    PhoneParameterEstimator.cache_clear()
+    return _CATALOG
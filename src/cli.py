@@ -0,0 +1,136 @@
+import argparse
+import itertools
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from agingsystem import Aging
+from discharge import DischargeModel, FleetDischarge, SCENES
+import profiling
+
+
+def _remaining_life(spec, retention):
+    history = spec.get('history') or {}
+    aging_model = Aging(battery_type=spec['battery'].get('chemistry', 'Lipo'))
+    pattern = dict(Aging.USAGE_FIELDS)
+    pattern.update(history.get('usage_pattern') or {})
+    return aging_model.estimate_remaining_life(retention, pattern)
+
+
+RECORD_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def _error(line, e):
+    return {'line': line, 'error': f"{type(e).__name__}: {e}"}
+
+
+def process_batch(lines, start, scenes=SCENES, T=298.15, SOC_0=100, threshold=1):
+    """
+    处理一批JSONL规格行，返回同样顺序的JSONL结果行（line为输入行号，从0开始，跳过空行）
+    解析失败、规格不完整或计算出错的行输出{'line', 'error'}，不影响同批其它记录
+    """
+    out = [None] * len(lines)
+    models, slots = [], []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            model = DischargeModel(json.loads(line), scenes)
+            out[i] = {
+                'line': start + i,
+                'name': model.spec.get('name'),
+                'retention': model.retention,
+                'remaining_life_days': _remaining_life(model.spec, model.retention),
+            }
+            models.append(model)
+            slots.append(i)
+        except RECORD_ERRORS as e:
+            out[i] = _error(start + i, e)
+    if models:
+        options = {'t': float('inf'), 'SOC_0': SOC_0, 'T': T, 'threshold': threshold}
+        try:
+            hours = FleetDischarge(models, scenes).runtime(**options)
+        except RECORD_ERRORS:
+            # 批量计算失败时逐条重算，只让出错的记录输出error
+            hours = [None] * len(models)
+            for row, (i, model) in enumerate(zip(slots, models)):
+                try:
+                    hours[row] = FleetDischarge([model], scenes).runtime(**options)[0]
+                except RECORD_ERRORS as e:
+                    out[i] = _error(start + i, e)
+        for row, i in enumerate(slots):
+            if hours[row] is not None:
+                out[i]['runtime_h'] = dict(zip(scenes, hours[row].tolist()))
+    return [json.dumps(r, ensure_ascii=False) for r in out if r is not None]
+
+
+def _batches(stream, batch_size):
+    start = 0
+    while True:
+        lines = list(itertools.islice(stream, batch_size))
+        if not lines:
+            return
+        yield start, lines
+        start += len(lines)
+
+
+def _write(out, results):
+    if results:
+        out.write('\n'.join(results) + '\n')
+
+
+def run(stream, out, workers=1, batch_size=1000, **options):
+    """
+    流式处理：按batch_size分批，workers>1时交给进程池；
+    在途批次数有上限，结果按输入顺序写出
+    调用方启用了profiling时，各工作进程的分阶段统计合并进当前统计
+    """
+    if workers <= 1:
+        for start, lines in _batches(stream, batch_size):
+            _write(out, process_batch(lines, start, **options))
+        return
+    stats = profiling.active()
+    task = profiling.wrap(process_batch, stats)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for start, lines in _batches(stream, batch_size):
+            pending.append(pool.submit(task, lines, start, **options))
+            if len(pending) >= 2 * workers:
+                _write(out, profiling.unwrap(pending.popleft().result(), stats))
+        while pending:
+            _write(out, profiling.unwrap(pending.popleft().result(), stats))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='批量预测：每行一个设备规格(JSON)，输出容量保持率、剩余寿命与各场景续航(JSONL)')
+    parser.add_argument('input', nargs='?', default='-', help="输入JSONL文件，'-'为标准输入")
+    parser.add_argument('-o', '--output', default='-', help="输出JSONL文件，'-'为标准输出")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--scenes', default=','.join(SCENES), help='场景列表，逗号分隔')
+    parser.add_argument('--temperature', type=float, default=298.15, help='环境温度(K)')
+    parser.add_argument('--soc0', type=float, default=100, help='初始SOC(%%)')
+    parser.add_argument('--threshold', type=float, default=1, help='放空阈值SOC(%%)')
+    parser.add_argument('--profile', action='store_true', help='把分阶段耗时统计打印到标准错误')
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    dst = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    if args.profile:
+        profiling.enable()
+    try:
+        run(src, dst, workers=args.workers, batch_size=args.batch_size,
+            scenes=tuple(args.scenes.split(',')), T=args.temperature, SOC_0=args.soc0,
+            threshold=args.threshold)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+        if args.profile:
+            print(profiling.disable().report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,131 @@
+from concurrent.futures import ProcessPoolExecutor
 from dependencies import Dependencies as dp
+from rainflow import RainflowCounter
+
+# 惰性导入：归约第一块样本时才加载numpy
+np=dp.get_numpy()
+
+# 遥测日志的默认列名
+TELEMETRY_COLUMNS = {'timestamp': 'timestamp', 'SOC': 'SOC',
+                     'temperature': 'temperature', 'current': 'current'}
+
+
+class UsageReducer:
+    """
+    遥测样本的单遍归约器，内存占用与样本数无关
+    样本约定: timestamp(秒), SOC(%), temperature(°C或K), current(mA，放电为正、充电为负)
+    """
+
+    def __init__(self, temp_unit='C', idle_current=50, fast_charge_current=2000,
+                 low_charge_temp=283.15, dod_histogram=False):
+        self.temp_offset = 273.15 if temp_unit == 'C' else 0.0
+        self.idle_current = idle_current
+        self.fast_charge_current = fast_charge_current
+        self.low_charge_temp = low_charge_temp
+        self.dod_histogram = dod_histogram
+
+        self.n = 0
+        self.t_first = None
+        self.t_last = None
+        self.soc_sum = 0.0
+        self.temp_sum = 0.0
+        self.idle_n = 0
+        self.idle_soc_sum = 0.0
+        self.charge_n = 0
+        self.fast_charge_n = 0
+        self.low_temp_charge = False
+        self.rainflow = RainflowCounter()
+
+    def update(self, timestamp, soc, temp, current):
+        """归约一个分块（各参数为等长数组）"""
+        if len(soc) == 0:
+            return
+        timestamp = np.asarray(timestamp, dtype=float)
+        soc = np.asarray(soc, dtype=float)
+        temp = np.asarray(temp, dtype=float) + self.temp_offset
+        current = np.asarray(current, dtype=float)
+
+        if self.t_first is None:
+            self.t_first = timestamp[0]
+        self.t_last = timestamp[-1]
+        self.n += len(soc)
+        self.soc_sum += soc.sum()
+        self.temp_sum += temp.sum()
+
+        idle = np.abs(current) < self.idle_current
+        self.idle_n += int(idle.sum())
+        self.idle_soc_sum += soc[idle].sum()
+        charging = current < 0
+        self.charge_n += int(charging.sum())
+        self.fast_charge_n += int((-current[charging] >= self.fast_charge_current).sum())
+        self.low_temp_charge |= bool((temp[charging] < self.low_charge_temp).any())
+
+        # 循环次数与放电深度由流式雨流计数得到
+        self.rainflow.update(soc)
+
+    def result(self):
+        """返回main.py与Aging使用的usage_history字典"""
+        if self.n == 0:
+            raise ValueError("No telemetry samples")
+        avg_SOC = float(self.soc_sum / self.n / 100)
+        avg_temp = float(self.temp_sum / self.n)
+        cycles = self.rainflow.summary()
+        DOD_avg = cycles['DOD_avg']
+        history = {
+            'age_days': float(self.t_last - self.t_first) / 86400,
+            'cycles_completed': cycles['cycles'],
+            'avg_SOC': avg_SOC,
+            'avg_temp': avg_temp,
+            'DOD_avg': DOD_avg,
+            'usage_pattern': {
+                'avg_temp': avg_temp,
+                'avg_dod': DOD_avg,
+                'storage_soc': float(self.idle_soc_sum / self.idle_n / 100) if self.idle_n else avg_SOC,
+                'fast_charge_ratio': self.fast_charge_n / self.charge_n if self.charge_n else 0.0,
+                'low_temp_charge': self.low_temp_charge
+            }
+        }
+        if self.dod_histogram:
+            histogram = self.rainflow.histogram()
+            history['dod_histogram'] = {'dod': histogram['dod'].tolist(),
+                                        'counts': histogram['counts'].tolist()}
+        return history
+
+
 class DataCleaner:
     pd=dp.get_pandas()
 
     @staticmethod
-    def loader(file_path):
-        origin_data=pd.read_csv(file_path)
-        df.fillna(method="ffill")#Need to change method if necessary
-        df.groupby().agg()
-        pd.merge()
+    def loader(file_path, chunksize=1_000_000, columns=TELEMETRY_COLUMNS, **reducer_options):
+        """
+        分块流式读取遥测CSV，单遍归约为usage_history
+        columns: 标准字段 → CSV列名；缺失值按前值填充（跨分块衔接）
+        """
+        pd = DataCleaner.pd
+        names = [columns[k] for k in ('timestamp', 'SOC', 'temperature', 'current')]
+        reducer = UsageReducer(**reducer_options)
+        last = None
+        for chunk in pd.read_csv(file_path, usecols=names, chunksize=chunksize):
+            chunk = chunk[names]
+            if last is not None:
+                chunk.iloc[0] = chunk.iloc[0].fillna(last)
+            chunk = chunk.ffill().dropna()
+            if chunk.empty:
+                continue
+            last = chunk.iloc[-1]
+            ts = chunk[names[0]]
+            if not pd.api.types.is_numeric_dtype(ts):
+                # 不依赖datetime64的存储精度（pandas 3解析字符串得到微秒精度）
+                ts = pd.to_datetime(ts)
+                ts = (ts - pd.Timestamp(0, tz=ts.dt.tz)).dt.total_seconds()
+            reducer.update(ts.to_numpy(), chunk[names[1]].to_numpy(),
+                           chunk[names[2]].to_numpy(), chunk[names[3]].to_numpy())
+        return reducer.result()
+
+    @staticmethod
+    def load_many(file_paths, workers=None, **loader_options):
+        """多个设备文件并行归约，返回{文件路径: usage_history}"""
+        file_paths = list(file_paths)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(DataCleaner.loader, p, **loader_options) for p in file_paths]
+            return {p: f.result() for p, f in zip(file_paths, futures)}
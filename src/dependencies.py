@@ -1,3 +1,27 @@
+class _LazyModule:
+    """
+    模块代理：首次访问属性时才导入真实模块
+    取到的属性会缓存在代理上，之后的访问与普通属性查找开销相同
+    """
+    def __init__(self,lib_name):
+        self._lib_name=lib_name
+        self._module=None
+
+    def _load(self):
+        if self._module is None:
+            self._module=Dependencies.check_import(self._lib_name)
+        return self._module
+
+    def __getattr__(self,attr):
+        value=getattr(self._load(),attr)
+        setattr(self,attr,value)
+        return value
+
+    def __repr__(self):
+        state="loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._lib_name}' ({state})>"
+
+
 class Dependencies:
     _required_libs=["pandas","numpy","matplotlib","sympy","scipy"]
     _installed_libs={}
@@ -36,18 +60,19 @@ class Dependencies:
         print(cls._installed_libs)
 
     
+    # get_*返回惰性代理，真正的导入推迟到第一次使用
     @classmethod
     def get_pandas(cls):
-        return cls.check_import("pandas")
+        return _LazyModule("pandas")
     @classmethod
     def get_numpy(cls):
-        return cls.check_import("numpy")
+        return _LazyModule("numpy")
     @classmethod
     def get_plt(cls):
-        return cls.check_import("matplotlib")
+        return _LazyModule("matplotlib")
     @classmethod
     def get_sympy(cls):
-        return cls.check_import("sympy")
+        return _LazyModule("sympy")
     @classmethod
     def get_scipy(cls):
-        return cls.check_import("scipy")
+        return _LazyModule("scipy")
@@ -0,0 +1,336 @@
+import copy
+from collections import namedtuple
+import numpy as np
+from parameters import PhoneParameterEstimator
+from agingsystem import Aging
+from ocvcurve import voltage as voltage_array, f_SOC as f_SOC_array, runtime_integral
+import profiling
+
+SCENES = ('B', 'V', 'G', 'M')
+# power_scene中参与求和的部件（coefficients键 → baseline键）
+_COMPONENTS = (('s', 'P_s'), ('n', 'P_n'), ('g', 'P_g'), ('b', 'P_b'))
+
+# 自适应积分结果：t_empty为到达阈值的时刻(s)，未到达为None；sol(t)为SOC稠密插值
+DischargeSolution = namedtuple('DischargeSolution', ['t_empty', 'sol', 'nfev'])
+
+
+def _check_every(every):
+    """记录间隔须为正整数"""
+    if isinstance(every, bool) or not isinstance(every, (int, np.integer)) or every < 1:
+        raise ValueError(f"every must be a positive integer, got {every!r}")
+
+
+def _constant_solution(value):
+    """与OdeSolution同调用方式的常数解：sol(t)返回(1,)或(1, len(t))"""
+    def sol(t):
+        return np.full((1,) + np.shape(t), float(value))
+    return sol
+
+
+def power_scene_array(scenes, params_list):
+    """
+    批量场景功率
+    scenes: 场景列表，长度M
+    params_list: estimate_all_parameters()结果列表，长度N
+    返回:
+        (N, M) 总功率(W)
+    """
+    power = np.empty((len(params_list), len(scenes)))
+    for n, params in enumerate(params_list):
+        baseline = params['baseline']
+        for m, scene in enumerate(scenes):
+            coef = params['coefficients'][scene]
+            p_total = sum(coef[e] * baseline[p] for e, p in _COMPONENTS)
+            p_total += coef['c'] * baseline['P_c'][scene]
+            power[n, m] = p_total * (1 + params['coupling'][scene])
+    return power
+
+
+def f_T_array(T):
+    """温度容量因子（数组版）"""
+    T = np.asarray(T, dtype=float)
+    T_0 = 298.15
+    T_c = 278.15
+    delta_T = 4
+    alpha_T = 0.001
+    r = (1 - alpha_T * (T - T_0) ** 2) / (1 + np.exp(-(T - T_c) / delta_T))
+    return np.where(T < T_0, r, 1.0)
+
+
+def spec_retention(spec):
+    """按spec['history']计算容量保持率；没有历史记录时视为新电池"""
+    history = spec.get('history')
+    if history is None:
+        return 1.0
+    aging_model = Aging(battery_type=spec['battery'].get('chemistry', 'Lipo'))
+    return aging_model.capacity_degradation(
+        age_days=history['age_days'],
+        cycles_completed=history['cycles_completed'],
+        avg_SOC=history['avg_SOC'],
+        avg_temp=history['avg_temp'],
+        DOD_avg=history['DOD_avg'],
+        dod_histogram=history.get('dod_histogram')
+    )
+
+
+def open_trajectory(path, shape, dtype=np.float32):
+    """
+    创建.npy格式的内存映射输出文件，其它进程可用np.load(path, mmap_mode='r')直接读取
+    """
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=tuple(shape))
+
+
+def C_eff_array(SOC, T, retention, C_0):
+    """有效容量（数组版），各参数按numpy规则广播"""
+    return np.asarray(C_0) * f_T_array(T) * f_SOC_array(SOC) * np.asarray(retention)
+
+
+class DischargeModel:
+    """
+    单台设备的放电模型
+    构造时一次性冻结参数估算、容量保持率和各场景功率，之后每次查询只做积分
+    """
+
+    def __init__(self, spec, scenes=SCENES):
+        stats = profiling.active()
+        if stats: stats.mark()
+        self.spec = spec
+        self.params = PhoneParameterEstimator.cached(spec)
+        if stats: stats.lap('estimate')
+        self.retention = spec_retention(spec)
+        if stats: stats.lap('degradation')
+        self.capacity = float(spec['battery']['capacity'])
+        self.power = dict(zip(scenes, power_scene_array(scenes, [self.params])[0]))
+        if stats: stats.lap('power')
+
+    def with_retention(self, retention):
+        """同一设备换一个容量保持率（如老化推进后），不重新估算参数"""
+        model = copy.copy(self)
+        model.retention = retention
+        return model
+
+    def simulate(self, t, dt=600, SOC_0=100, T=298.15, scene='B', dtype=np.float64, every=1):
+        """
+        前向Euler积分，步进规则与main.SOC相同
+        dtype: 输出精度（推进始终用float64）；every: 每every步记录一个点
+        返回:
+            ((n_steps - 1) // every + 1,) SOC(%)
+        """
+        _check_every(every)
+        n_steps = int(t / dt) + 1
+        soc = np.empty((n_steps - 1) // every + 1, dtype=dtype)
+        soc[0] = SOC_0
+        C_base = self.capacity * float(f_T_array(T)) * self.retention
+        I_base = 1000 * self.power[scene]
+        SOC_curr = SOC_0
+        stats = profiling.active()
+        if stats: stats.mark()
+        for i in range(1, n_steps):
+            C_eff_mAh = C_base * f_SOC_array(SOC_curr)
+            if stats: stats.lap('capacity_integral')
+            I_mA = I_base / voltage_array(SOC_curr)
+            if stats: stats.lap('current')
+            dSOC = -100 * (I_mA * dt / 3600) / C_eff_mAh
+            SOC_curr = max(0, min(100, SOC_curr + dSOC))
+            if i % every == 0:
+                soc[i // every] = SOC_curr
+            if stats: stats.lap('step')
+        return soc
+
+    def rhs(self, scene='B', T=298.15):
+        """dSOC/dt（%/s）的右端函数，供ODE求解器使用"""
+        C_base = self.capacity * float(f_T_array(T)) * self.retention
+        I_base = 1000 * self.power[scene]
+
+        def dSOC_dt(t, y):
+            SOC_curr = y[0]
+            I_mA = I_base / voltage_array(SOC_curr)
+            return [-100 * (I_mA / 3600) / (C_base * f_SOC_array(SOC_curr))]
+        return dSOC_dt
+
+    def solve(self, scene='B', t=15 * 3600, SOC_0=100, T=298.15, threshold=1,
+              rtol=1e-6, atol=1e-8):
+        """
+        自适应RK45积分，SOC降到threshold时终止
+        返回:
+            DischargeSolution，t_empty为精确的放空时刻(s)
+        """
+        if SOC_0 <= threshold:
+            # 起始即已放空：与time_to_empty/euler一致，放空时刻为0，轨迹为常数
+            return DischargeSolution(0.0, _constant_solution(SOC_0), 0)
+        from scipy.integrate import solve_ivp  # 仅自适应模式需要，避免导入discharge时加载
+
+        def empty(t, y):
+            return y[0] - threshold
+        empty.terminal = True
+        empty.direction = -1
+
+        result = solve_ivp(self.rhs(scene, T), (0, t), [SOC_0], method='RK45',
+                           events=empty, dense_output=True, rtol=rtol, atol=atol)
+        t_events = result.t_events[0]
+        t_empty = float(t_events[0]) if len(t_events) else None
+        return DischargeSolution(t_empty, result.sol, result.nfev)
+
+    def time_to_empty(self, scene='B', SOC_0=100, T=298.15, threshold=1):
+        """
+        放电时间（小时）的直接求解，不生成轨迹
+        恒功率下 dt = -36·C_0·f_T·retention·f_SOC(s)·V(s)/(1000·P) ds，
+        对SOC的积分由ocvcurve.runtime_integral查表得到；SOC_0/T/threshold可为数组
+        """
+        stats = profiling.active()
+        if stats: stats.mark()
+        C_base = self.capacity * f_T_array(T) * self.retention
+        W = np.maximum(runtime_integral(SOC_0) - runtime_integral(threshold), 0.0)
+        if stats: stats.lap('capacity_integral')
+        return C_base * W / (100000 * self.power[scene])
+
+    def runtime(self, scene='B', t=15 * 3600, dt=300, SOC_0=100, T=298.15, threshold=1,
+                method='quadrature'):
+        """
+        续航时间（小时）：SOC首次不高于threshold的时刻，在t内未放空返回None
+        method: 'quadrature'查表直接求解；'adaptive'用事件检测求精确时刻；
+                'euler'按dt步长扫描轨迹（与main.SOC结果一致）
+        """
+        if method == 'quadrature':
+            hours = float(self.time_to_empty(scene, SOC_0, T, threshold))
+            return None if hours * 3600 > t else hours
+        if method == 'adaptive':
+            t_empty = self.solve(scene, t, SOC_0, T, threshold).t_empty
+            return None if t_empty is None else t_empty / 3600
+        if method != 'euler':
+            raise ValueError(f"Unknown integration method: {method}")
+        below = np.flatnonzero(self.simulate(t, dt, SOC_0, T, scene) <= threshold)
+        if len(below) == 0:
+            return None
+        return below[0] * dt / 3600
+
+
+class FleetDischarge:
+    """批量放电引擎：N台设备 × M个场景的SOC轨迹同时推进"""
+
+    # 按设备排列（第一维为N）的属性，subset按行取子集
+    DEVICE_FIELDS = ('models', 'specs', 'power', 'retention', 'capacity')
+
+    def __init__(self, specs, scenes=SCENES):
+        self.scenes = list(scenes)
+        self.models = [s if isinstance(s, DischargeModel) else DischargeModel(s, self.scenes)
+                       for s in specs]
+        self.specs = [m.spec for m in self.models]
+        self.power = np.array([[m.power[sc] for sc in self.scenes] for m in self.models])  # (N, M)
+        self.retention = np.array([m.retention for m in self.models])                    # (N,)
+        self.capacity = np.array([m.capacity for m in self.models])
+
+    def subset(self, rows):
+        """取部分设备的引擎（浅拷贝，DEVICE_FIELDS中的属性按rows取子集）"""
+        rows = np.arange(len(self.models))[rows]
+        sub = copy.copy(self)
+        for name in self.DEVICE_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                setattr(sub, name, [value[i] for i in rows.tolist()])
+            else:
+                setattr(sub, name, np.asarray(value)[rows])
+        return sub
+
+    def _steps(self, t, dt, SOC_0, T):
+        """
+        前向Euler推进，逐步产出(步号, 当前SOC)，从第0步开始
+        当前SOC为(N, M)数组并原地更新，需要保留时由调用方复制
+        """
+        n_steps = int(t / dt) + 1
+        SOC_curr = np.array(np.broadcast_to(SOC_0, self.power.shape), dtype=float)
+        C_base = (self.capacity * self.retention)[:, None] * f_T_array(T)
+        I_base = 1000 * self.power
+        stats = profiling.active()
+        yield 0, SOC_curr
+        if stats: stats.mark()
+        for i in range(1, n_steps):
+            C_eff_mAh = C_base * f_SOC_array(SOC_curr)
+            if stats: stats.lap('capacity_integral')
+            I_mA = I_base / voltage_array(SOC_curr)
+            if stats: stats.lap('current')
+            dSOC = -100 * (I_mA * dt / 3600) / C_eff_mAh
+            np.clip(SOC_curr + dSOC, 0, 100, out=SOC_curr)
+            if stats: stats.lap('step')
+            yield i, SOC_curr
+            if stats: stats.lap('record')
+
+    def trajectory_shape(self, t, dt=600, every=1):
+        """simulate输出的形状 (N, M, n_records)"""
+        _check_every(every)
+        n_steps = int(t / dt) + 1
+        return self.power.shape + ((n_steps - 1) // every + 1,)
+
+    def simulate(self, t, dt=600, SOC_0=100, T=298.15, dtype=np.float64, every=1, out=None):
+        """
+        前向Euler推进所有轨迹（内部状态只有当前一步，输出按需抽稀）
+        T: 温度(K)，标量或可广播到(N, M)的数组
+        dtype: 输出精度，如np.float32（推进始终用float64）
+        every: 每every步记录一个点
+        out: 预分配的输出数组，形状为trajectory_shape(t, dt, every)，可以是memmap
+        返回:
+            (N, M, n_records) SOC(%)
+        """
+        shape = self.trajectory_shape(t, dt, every)
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif out.shape != shape:
+            raise ValueError(f"Output shape {out.shape} does not match trajectory shape {shape}")
+        for i, SOC_curr in self._steps(t, dt, SOC_0, T):
+            if i % every == 0:
+                out[..., i // every] = SOC_curr
+        return out
+
+    def simulate_to_file(self, path, t, dt=600, SOC_0=100, T=298.15, dtype=np.float32, every=1):
+        """
+        轨迹直接写入.npy内存映射文件，内存中只保留当前一步
+        文件按时间主序存储为(n_records, N, M)，每步写入一块连续区域
+        返回:
+            文件的memmap
+        """
+        N, M, n_records = self.trajectory_shape(t, dt, every)
+        mm = open_trajectory(path, (n_records, N, M), dtype)
+        self.simulate(t, dt, SOC_0, T, every=every, out=np.moveaxis(mm, 0, -1))
+        mm.flush()
+        return mm
+
+    def crossings(self, thresholds, t=15 * 3600, dt=300, SOC_0=100, T=298.15):
+        """
+        只记录阈值穿越：SOC首次不高于各阈值的时刻（小时），不保存轨迹
+        返回:
+            (N, M, K) K为阈值个数，在t内未到达的为nan
+        """
+        thresholds = np.asarray(thresholds, dtype=float)
+        first = np.full(self.power.shape + thresholds.shape, -1)
+        for i, SOC_curr in self._steps(t, dt, SOC_0, T):
+            hit = (SOC_curr[..., None] <= thresholds) & (first < 0)
+            first[hit] = i
+        return np.where(first >= 0, first * dt / 3600, np.nan)
+
+    def runtime(self, t=15 * 3600, dt=300, SOC_0=100, T=298.15, threshold=1,
+                method='quadrature'):
+        """
+        续航时间（小时），即SOC首次不高于threshold的时刻
+        method: 'quadrature'查表直接求解；'euler'逐步推进并记录阈值穿越
+        返回:
+            (N, M)，在t内未放空的为nan
+        """
+        if method == 'quadrature':
+            stats = profiling.active()
+            if stats: stats.mark()
+            C_base = (self.capacity * self.retention)[:, None] * f_T_array(T)
+            W = np.maximum(runtime_integral(SOC_0) - runtime_integral(threshold), 0.0)
+            if stats: stats.lap('capacity_integral')
+            hours = C_base * W / (100000 * self.power)
+            return np.where(hours * 3600 > t, np.nan, hours)
+        if method != 'euler':
+            raise ValueError(f"Unknown integration method: {method}")
+        return self.crossings([threshold], t, dt, SOC_0, T)[..., 0]
+
+
+def runtime(spec, scene='B', SOC_0=100, T=298.15, threshold=1):
+    """
+    续航时间（小时）查询：spec可为规格字典或已构建的DischargeModel
+    """
+    model = spec if isinstance(spec, DischargeModel) else DischargeModel(spec)
+    return float(model.time_to_empty(scene, SOC_0, T, threshold))
@@ -0,0 +1,169 @@
+from collections import namedtuple
+import numpy as np
+from agingsystem import AgingSimulator
+from discharge import FleetDischarge
+from thermal import ThermalFleetDischarge
+
+# 设计变量 → 默认搜索区间
+#   capacity    电池标称容量(mAh)
+#   retention   容量保持率(0-1)
+#   brightness  屏幕负载系数a_s的乘数（相对估算亮度比例）
+DESIGN_BOUNDS = {
+    'capacity': (500.0, 20000.0),
+    'retention': (0.05, 1.0),
+    'brightness': (0.0, 3.0),
+}
+# 续航搜索上限(s)：超过的按t_max计，目标续航须小于它
+DEFAULT_T_MAX = 96 * 3600
+# 默认收敛容差（设计变量的绝对误差）
+DESIGN_XTOL = {'capacity': 1.0, 'retention': 1e-4, 'brightness': 1e-4}
+
+# value: 解（无法在区间内达到目标的为nan）；runtime_h: 解处的续航
+# tolerance: 解与真实边界的最大距离（最终区间宽度）；converged: 是否在max_iter内收敛
+InverseResult = namedtuple('InverseResult',
+                           ['value', 'runtime_h', 'tolerance', 'converged', 'iterations'])
+
+
+def projected_retention(specs, days):
+    """
+    按spec['history']的平均使用条件再老化days天后的容量保持率，(N,)
+    没有历史记录的规格视为新电池（1.0）
+    """
+    out = np.ones(len(specs))
+    for i, spec in enumerate(specs):
+        history = spec.get('history')
+        if history is None:
+            continue
+        sim = AgingSimulator.from_history(history, spec['battery'].get('chemistry', 'Lipo'))
+        daily_cycles = history['cycles_completed'] / max(history['age_days'], 1)
+        if days > 0:
+            sim.step(cycles=daily_cycles * days, avg_SOC=history['avg_SOC'],
+                     avg_temp=history['avg_temp'], DOD_avg=history['DOD_avg'], days=days)
+        out[i] = sim.retention
+    return out
+
+
+class RuntimeObjective:
+    """
+    候选规格在单一场景下、以某个设计变量为自变量的续航（小时，批量）
+    参数估算与场景功率在构造时算一次（经PhoneParameterEstimator.cached），求根时只改设计变量
+    """
+
+    def __init__(self, specs, variable='capacity', scene='V', retention=None, T=298.15,
+                 SOC_0=100, threshold=1, method='quadrature', t_max=DEFAULT_T_MAX, dt=60,
+                 thermal=False):
+        if variable not in DESIGN_BOUNDS:
+            raise ValueError(f"Unknown design variable: {variable}")
+        engine = ThermalFleetDischarge if thermal else FleetDischarge
+        self.fleet = engine(specs, (scene,))
+        if retention is not None:
+            self.fleet.retention = np.broadcast_to(np.asarray(retention, dtype=float),
+                                                   self.fleet.retention.shape).copy()
+        self.variable = variable
+        self.scene = scene
+        self.options = {'T': T, 'SOC_0': SOC_0, 'threshold': threshold,
+                        'method': 'euler' if thermal else method, 'dt': dt,
+                        't': t_max}
+        params = [m.params for m in self.fleet.models]
+        self.coupling = np.array([p['coupling'][scene] for p in params])
+        self.screen = np.array([p['coefficients'][scene]['s'] * p['baseline']['P_s']
+                                for p in params])
+        self.rest = self.fleet.power[:, 0] / (1 + self.coupling) - self.screen
+
+    def __call__(self, x, rows):
+        """x: (len(rows),) 设计变量取值，返回对应设备的续航(h)，未放空按t_max计"""
+        sub = self.fleet.subset(rows)
+        if self.variable == 'capacity':
+            sub.capacity = x
+        elif self.variable == 'retention':
+            sub.retention = x
+        else:
+            base = x * self.screen[rows] + self.rest[rows]
+            sub.power = (base * (1 + self.coupling[rows]))[:, None]
+            if isinstance(sub, ThermalFleetDischarge):
+                sub.P_base = base[:, None]
+        runtime = sub.runtime(**self.options)[:, 0]
+        return np.where(np.isnan(runtime), self.options['t'] / 3600, runtime)
+
+
+def bracketed_solve(func, target, lo, hi, xtol, max_iter=60):
+    """
+    批量Illinois法（改进的试位法）求 func(x) = target 的边界
+    以 func(x) >= target 为可行，区间收缩到宽度不超过2·xtol，返回可行一侧的端点，
+    因此对逐步扫描得到的阶梯状续航同样成立
+    func(x, rows)只对尚未收敛的行求值；lo/hi为(N,)区间，两端可行性须不同，
+    否则该行无解（value为nan）
+    返回:
+        InverseResult
+    """
+    lo = np.array(lo, dtype=float)
+    hi = np.array(hi, dtype=float)
+    n = len(lo)
+    rows = np.arange(n)
+    g_lo = func(lo, rows) - target
+    g_hi = func(hi, rows) - target
+    bracketed = (g_lo >= 0) != (g_hi >= 0)
+    done = ~bracketed
+    side = np.zeros(n, dtype=int)     # 上一次被替换的端点：-1为lo，+1为hi
+    iterations = np.zeros(n, dtype=int)
+    for _ in range(max_iter):
+        done |= np.abs(hi - lo) <= 2 * xtol
+        active = np.flatnonzero(~done)
+        if len(active) == 0:
+            break
+        a, b = lo[active], hi[active]
+        fa, fb = g_lo[active], g_hi[active]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = b - fb * (b - a) / (fb - fa)
+        # 试位点与两端至少相距xtol：落在根附近时下一步即跨到另一侧，区间直接收缩到xtol；
+        # 数值退化(nan)时退回二分
+        x = np.where(np.isnan(x), 0.5 * (a + b), x)
+        x = np.clip(x, np.minimum(a, b) + xtol, np.maximum(a, b) - xtol)
+        g = func(x, active) - target
+        iterations[active] += 1
+
+        replace_hi = (g >= 0) == (fb >= 0)
+        # Illinois修正：同一端点连续两次保留时，把它的函数值减半
+        halve_lo = replace_hi & (side[active] == 1)
+        halve_hi = ~replace_hi & (side[active] == -1)
+        lo[active] = np.where(replace_hi, a, x)
+        hi[active] = np.where(replace_hi, x, b)
+        g_lo[active] = np.where(replace_hi, np.where(halve_lo, 0.5 * fa, fa), g)
+        g_hi[active] = np.where(replace_hi, g, np.where(halve_hi, 0.5 * fb, fb))
+        side[active] = np.where(replace_hi, 1, -1)
+
+    # Illinois修正改写过端点函数值，可行一侧的续航按最终端点重算
+    feasible_hi = g_hi >= 0
+    value = np.where(bracketed, np.where(feasible_hi, hi, lo), np.nan)
+    ok = np.flatnonzero(bracketed)
+    runtime = np.full(n, np.nan)
+    if len(ok):
+        runtime[ok] = func(value[ok], ok)
+    tolerance = np.where(bracketed, np.abs(hi - lo), np.nan)
+    converged = bracketed & (np.abs(hi - lo) <= 2 * xtol)
+    return InverseResult(value, runtime, tolerance, converged, iterations)
+
+
+def solve_design(specs, target_h, variable='capacity', scene='V', bounds=None, xtol=None,
+                 years=0, retention=None, max_iter=60, **options):
+    """
+    逆向设计：求各候选规格达到target_h小时续航所需的设计变量
+    variable: 'capacity'(最小容量) / 'retention'(最低保持率) / 'brightness'(最大亮度乘数)
+    years: 先按各自历史使用条件再老化若干年（retention给定时忽略）
+    options: 传给RuntimeObjective（T、SOC_0、threshold、method、t_max、dt、thermal）
+    返回:
+        InverseResult，各字段为(N,)
+    """
+    if retention is None and years:
+        retention = projected_retention(specs, 365 * years)
+    objective = RuntimeObjective(specs, variable, scene, retention, **options)
+    lo, hi = bounds or DESIGN_BOUNDS[variable]
+    n = len(objective.fleet.models)
+    return bracketed_solve(objective, target_h, np.full(n, lo, dtype=float),
+                           np.full(n, hi, dtype=float),
+                           DESIGN_XTOL[variable] if xtol is None else xtol, max_iter=max_iter)
+
+
+def minimum_capacity(specs, target_h, scene='V', years=0, **options):
+    """达到target_h小时续航（老化years年后）所需的最小电池容量(mAh)"""
+    return solve_design(specs, target_h, 'capacity', scene, years=years, **options)
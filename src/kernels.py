@@ -0,0 +1,201 @@
+from functools import lru_cache
+from dependencies import Dependencies
+from agingsystem import Aging
+import ocvcurve
+
+# 独立的符号内核：供需要精确灵敏度的调用方（如老化参数cycle_life/calendar_fade/Ea的标定）使用。
+# pcalculator拟合的是另一套场景功率模型（LINEAR/CN/SC），其雅可比为闭式的线性+双线性项，
+# 手写即精确，因此不依赖这里的power_kernel
+# 惰性导入：只有编译内核时才加载sympy
+sp=Dependencies.get_sympy()
+np=Dependencies.get_numpy()
+
+POWER_ARGS = ('a_s', 'a_c', 'a_n', 'a_g', 'a_b', 'P_s', 'P_c', 'P_n', 'P_g', 'P_b', 'coupling')
+CAPACITY_ARGS = ('SOC', 'T', 'retention', 'C_0')
+AGING_ARGS = ('age_days', 'cycles_completed', 'avg_SOC', 'avg_temp', 'DOD_avg',
+              'cycle_life', 'calendar_fade', 'Ea')
+
+
+class Kernel:
+    """
+    符号模型编译成的NumPy内核
+    表达式与全部一阶偏导经公共子表达式消除(cse)后lambdify为同一个函数，
+    参数按关键字传入，可为标量或可相互广播的数组；defaults中的参数可省略
+    """
+
+    def __init__(self, name, symbols, expr, defaults=None):
+        self.name = name
+        self.args = tuple(str(s) for s in symbols)
+        self.defaults = dict(defaults or {})
+        self.expr = expr
+        self.gradient_expr = [sp.diff(expr, s) for s in symbols]
+        printer = _printer()
+        self._value = sp.lambdify(symbols, expr, modules='numpy', printer=printer, cse=True)
+        self._fused = sp.lambdify(symbols, [expr] + self.gradient_expr, modules='numpy',
+                                  printer=printer, cse=True)
+
+    def _arguments(self, kwargs):
+        kwargs = dict(self.defaults, **kwargs)
+        missing = [a for a in self.args if a not in kwargs]
+        unknown = [k for k in kwargs if k not in self.args]
+        if missing or unknown:
+            raise TypeError(f"{self.name} kernel: missing {missing}, unexpected {unknown}")
+        values = [np.asarray(kwargs[a], dtype=float) for a in self.args]
+        return values, np.broadcast_shapes(*(v.shape for v in values))
+
+    def __call__(self, **kwargs):
+        values, shape = self._arguments(kwargs)
+        # 分段表达式两侧都会求值，未选中分支里的除零/0⁰不影响结果
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.broadcast_to(self._value(*values), shape)
+
+    def value_and_gradient(self, **kwargs):
+        """
+        返回:
+            (值, {参数名: 偏导})，均为参数广播后的形状
+        """
+        values, shape = self._arguments(kwargs)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = self._fused(*values)
+        value = np.broadcast_to(out[0], shape)
+        return value, {a: np.broadcast_to(g, shape) for a, g in zip(self.args, out[1:])}
+
+    def gradient(self, **kwargs):
+        return self.value_and_gradient(**kwargs)[1]
+
+
+@lru_cache(maxsize=None)
+def _printer():
+    """
+    Min/Max输出为逐元素的numpy.minimum/maximum（默认的amin要求各参数同形状）
+    """
+    from sympy.printing.numpy import NumPyPrinter
+
+    class _KernelPrinter(NumPyPrinter):
+        def _print_Min(self, expr):
+            return self._reduce('minimum', expr.args)
+
+        def _print_Max(self, expr):
+            return self._reduce('maximum', expr.args)
+
+        def _reduce(self, func, args):
+            out = self._print(args[0])
+            for arg in args[1:]:
+                out = f"numpy.{func}({out}, {self._print(arg)})"
+            return out
+
+    return _KernelPrinter({'fully_qualified_modules': True, 'inline': True,
+                           'allow_unknown_functions': True, 'user_functions': {}})
+
+
+def _clip(x, lo, hi):
+    return sp.Min(sp.Max(x, lo), hi)
+
+
+def _min(x, hi):
+    return sp.Min(x, hi)
+
+
+@lru_cache(maxsize=None)
+def power_kernel():
+    """
+    场景功率 P = (a_s·P_s + a_c·P_c + a_n·P_n + a_g·P_g + a_b·P_b)·(1 + coupling)
+    与batterymodel.power_scene / discharge.power_scene_array一致
+    """
+    symbols = sp.symbols(POWER_ARGS, real=True)
+    a, P, coupling = symbols[:5], symbols[5:10], symbols[10]
+    expr = sum(ai * Pi for ai, Pi in zip(a, P)) * (1 + coupling)
+    return Kernel('power', symbols, expr)
+
+
+def power_arguments(scenes, params_list):
+    """
+    把estimate_all_parameters()结果整理成power_kernel的参数
+    返回:
+        {参数名: (N, M)数组}
+    """
+    arrays = {name: np.empty((len(params_list), len(scenes))) for name in POWER_ARGS}
+    for n, params in enumerate(params_list):
+        baseline = params['baseline']
+        for m, scene in enumerate(scenes):
+            coef = params['coefficients'][scene]
+            for e in ('s', 'c', 'n', 'g', 'b'):
+                arrays['a_' + e][n, m] = coef[e]
+            arrays['P_s'][n, m] = baseline['P_s']
+            arrays['P_c'][n, m] = baseline['P_c'][scene]
+            arrays['P_n'][n, m] = baseline['P_n']
+            arrays['P_g'][n, m] = baseline['P_g']
+            arrays['P_b'][n, m] = baseline['P_b']
+            arrays['coupling'][n, m] = params['coupling'][scene]
+    return arrays
+
+
+def f_T_expr(T):
+    """温度容量因子（符号版，同C_eff.f_T）"""
+    T_0 = 298.15
+    T_c = 278.15
+    delta_T = 4
+    alpha_T = sp.Float(0.001)
+    r = (1 - alpha_T * (T - T_0) ** 2) / (1 + sp.exp(-(T - T_c) / delta_T))
+    return sp.Piecewise((r, T < T_0), (1, True))
+
+
+def f_SOC_expr(SOC):
+    """SOC容量因子（符号版，同ocvcurve.f_SOC）：按开路电压分段的累积能量E(SOC)/(V_nom·SOC)"""
+    knots, V0, slope, E0 = ocvcurve._KNOTS, ocvcurve._V0, ocvcurve._SLOPE, ocvcurve._E0
+    pieces = []
+    for k in range(len(knots)):
+        d = SOC - knots[k]
+        energy = E0[k] + V0[k] * d + sp.Float(0.5 * slope[k]) * d * d
+        f = _clip(energy / (ocvcurve.V_NOM * SOC), sp.Float(0.7), sp.Float(1.0))
+        bound = knots[k + 1] if k + 1 < len(knots) else None
+        pieces.append((f, SOC < bound) if bound is not None else (f, True))
+    return sp.Piecewise((sp.Float(0.8), SOC <= 0), *pieces)
+
+
+@lru_cache(maxsize=None)
+def capacity_kernel():
+    """有效容量 C = C_0·f_T(T)·f_SOC(SOC)·retention，与discharge.C_eff_array一致"""
+    symbols = sp.symbols(CAPACITY_ARGS, real=True)
+    SOC, T, retention, C_0 = symbols
+    return Kernel('capacity', symbols, C_0 * f_T_expr(T) * f_SOC_expr(SOC) * retention)
+
+
+@lru_cache(maxsize=None)
+def aging_kernel(battery_type='Lipo'):
+    """
+    容量保持率，与Aging.capacity_degradation_array一致
+    cycle_life、calendar_fade、Ea作为参数（可求偏导，用于标定），其余阈值取该电池类型的AGING_PARAMS
+    """
+    params = Aging(battery_type).params
+    symbols = sp.symbols(AGING_ARGS, real=True)
+    age, cycles, avg_SOC, avg_temp, DOD, cycle_life, calendar_fade, Ea = symbols
+    R = sp.Float(8.314)
+
+    # 日历老化
+    base_rate_per_day = 1 - (1 - calendar_fade) ** sp.Rational(1, 365)
+    temp_acceleration = sp.exp(Ea / R * (1 / sp.Float(params['T_ref']) - 1 / avg_temp))
+    soc_stress = sp.Piecewise(
+        (sp.Float(1.5), avg_SOC > params['stress_SOC_high']),
+        (sp.Float(1.3), avg_SOC < params['stress_SOC_low']),
+        (1 + 2 * sp.Abs(avg_SOC - sp.Float(0.5)), True))
+    k = base_rate_per_day * temp_acceleration * soc_stress
+    calendar_loss = _min(1 - (1 - k) ** (age ** sp.Float(Aging.CALENDAR_EXPONENT)), sp.Float(0.5))
+    # t^0.7、E^0.8在0处导数无界（lambdify后为-inf或0/0=nan）：新电池按损失恒为0处理，
+    # 即0处取零分支的梯度0，标定时这些样本对相应参数不提供灵敏度
+    calendar_loss = sp.Piecewise((calendar_loss, age > 0), (0, True))
+
+    # 循环老化
+    DOD_stress = sp.Piecewise((sp.Float(2.0), DOD > 0.8), (sp.Float(1.5), DOD > 0.5),
+                              (sp.Float(0.7) + DOD * sp.Float(0.6), True))
+    temp_factor = sp.Piecewise((sp.Float(2.0), avg_temp > params['stress_temp_high']),
+                               (sp.Float(1.5), avg_temp < params['stress_temp_low']),
+                               (sp.Float(1.0), True))
+    effective_cycles = cycles * sp.sqrt(DOD)
+    loss_rate = (effective_cycles / cycle_life) ** sp.Float(Aging.CYCLE_EXPONENT)
+    cycle_loss = _min(loss_rate * DOD_stress * temp_factor * sp.Float(0.2), sp.Float(0.3))
+    cycle_loss = sp.Piecewise((cycle_loss, sp.And(cycles > 0, DOD > 0)), (0, True))
+
+    retention = _clip((1 - calendar_loss) * (1 - cycle_loss), sp.Float(0.0), sp.Float(1.0))
+    defaults = {name: params[name] for name in ('cycle_life', 'calendar_fade', 'Ea')}
+    return Kernel('aging', symbols, retention, defaults)
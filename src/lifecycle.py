@@ -0,0 +1,52 @@
+import itertools
+import json
+import os
+from agingsystem import AgingSimulator
+from discharge import DischargeModel, SCENES
+
+
+def _save_checkpoint(path, day, sim):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'day': day, 'state': sim.to_dict()}, f)
+    os.replace(tmp, path)
+
+
+def iter_lifecycle(spec, daily_usage, scenes=SCENES, T=298.15, SOC_0=100, threshold=1,
+                   checkpoint_path=None, checkpoint_every=30):
+    """
+    多年生命周期模拟：逐日推进老化状态，并把当天的容量保持率代入放电模型
+    spec: 规格字典，带history时以其为初始状态，否则从新电池开始
+    daily_usage: 每天一条{'cycles', 'avg_SOC', 'avg_temp', 'DOD_avg'}的可迭代对象
+    checkpoint_path: 给定时每checkpoint_every天保存一次状态；文件已存在时从中断处继续
+                     （跳过daily_usage中已完成的天数）
+    逐日产出:
+        {'day', 'retention', 'runtime_h': {scene: 小时}}
+    """
+    model = DischargeModel(spec, scenes)
+    chemistry = spec['battery'].get('chemistry', 'Lipo')
+    start = 0
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        start = checkpoint['day']
+        sim = AgingSimulator.from_dict(checkpoint['state'])
+    elif spec.get('history') is not None:
+        sim = AgingSimulator.from_history(spec['history'], chemistry)
+    else:
+        sim = AgingSimulator(chemistry)
+
+    day = start
+    for usage in itertools.islice(daily_usage, start, None):
+        retention = float(sim.step(**usage))
+        day += 1
+        day_model = model.with_retention(retention)
+        yield {
+            'day': day,
+            'retention': retention,
+            'runtime_h': {s: float(day_model.time_to_empty(s, SOC_0, T, threshold)) for s in scenes},
+        }
+        if checkpoint_path and day % checkpoint_every == 0:
+            _save_checkpoint(checkpoint_path, day, sim)
+    if checkpoint_path:
+        _save_checkpoint(checkpoint_path, day, sim)
@@ -0,0 +1,243 @@
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from agingsystem import Aging
+from discharge import DischargeModel, SCENES, _COMPONENTS, f_T_array
+from ocvcurve import runtime_integral
+
+# 不确定参数 → (numpy Generator的分布方法名, 参数...)
+# 抽样值为相对点估计的乘数：
+#   brightness       屏幕负载系数a_s（亮度比例×内容因子）
+#   cpu_utilization  CPU负载系数a_c
+#   coupling         热耦合百分比
+#   cycle_life / calendar_fade / Ea  对应Aging.AGING_PARAMS
+DEFAULT_UNCERTAINTY = {
+    'brightness': ('normal', 1.0, 0.15),
+    'cpu_utilization': ('normal', 1.0, 0.2),
+    'coupling': ('uniform', 0.5, 1.5),
+    'cycle_life': ('normal', 1.0, 0.1),
+    'calendar_fade': ('lognormal', 0.0, 0.2),
+    'Ea': ('normal', 1.0, 0.05),
+}
+AGING_UNCERTAIN = ('cycle_life', 'calendar_fade', 'Ea')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def sample_multipliers(rng, uncertainty, n):
+    """按uncertainty抽取n组乘数，返回{参数名: (n,)数组}，负值截为0"""
+    draws = {}
+    for name in sorted(uncertainty):
+        kind, *args = uncertainty[name]
+        if not hasattr(rng, kind):
+            raise ValueError(f"Unknown distribution '{kind}' for {name}")
+        draws[name] = np.maximum(getattr(rng, kind)(*args, size=n), 0.0)
+    return draws
+
+
+class StreamingHistogram:
+    """
+    固定分箱的流式直方图，用于在有界内存下估计分位数
+    lo/hi可为形状shape的数组（每列一个区间），超出区间的值计入两端的箱，
+    同时精确记录每列的最小/最大值与均值
+    """
+
+    def __init__(self, lo, hi, bins=2000, shape=()):
+        self.shape = tuple(shape)
+        self.lo = np.broadcast_to(np.asarray(lo, dtype=float), self.shape).copy()
+        self.hi = np.broadcast_to(np.asarray(hi, dtype=float), self.shape).copy()
+        self.bins = bins
+        self.counts = np.zeros(self.shape + (bins,), dtype=np.int64)
+        self.n = 0
+        self.total = np.zeros(self.shape)
+        self.min = np.full(self.shape, np.inf)
+        self.max = np.full(self.shape, -np.inf)
+
+    def update(self, values):
+        """values: (K,) + shape，nan值忽略"""
+        values = np.asarray(values, dtype=float).reshape((-1,) + self.shape)
+        valid = ~np.isnan(values)
+        width = (self.hi - self.lo) / self.bins
+        k = np.clip(np.floor((values - self.lo) / width), 0, self.bins - 1)
+        k = np.where(valid, k, 0).astype(np.int64)
+        offset = np.arange(int(np.prod(self.shape))).reshape(self.shape) * self.bins
+        flat = (k + offset)[valid]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.n += len(values)
+        self.total += np.where(valid, values, 0.0).sum(axis=0)
+        self.min = np.minimum(self.min, np.where(valid, values, np.inf).min(axis=0))
+        self.max = np.maximum(self.max, np.where(valid, values, -np.inf).max(axis=0))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    def mean(self):
+        valid = self.counts.sum(axis=-1)
+        return np.where(valid > 0, self.total / np.maximum(valid, 1), np.nan)
+
+    def percentile(self, q):
+        """
+        分位数（箱内线性插值，结果限制在实测最小/最大值之间）
+        q: 百分数序列，返回shape + (len(q),)
+        """
+        q = np.asarray(q, dtype=float) / 100
+        counts = self.counts.reshape(-1, self.bins)
+        lo, hi = self.lo.ravel(), self.hi.ravel()
+        vmin, vmax = self.min.ravel(), self.max.ravel()
+        out = np.full((len(counts), len(q)), np.nan)
+        for i, c in enumerate(counts):
+            total = c.sum()
+            if total == 0:
+                continue
+            cum = np.cumsum(c)
+            target = q * total
+            j = np.minimum(np.searchsorted(cum, target, side='left'), self.bins - 1)
+            before = np.where(j > 0, cum[j - 1], 0)
+            frac = np.where(c[j] > 0, (target - before) / np.maximum(c[j], 1), 0.0)
+            width = (hi[i] - lo[i]) / self.bins
+            out[i] = np.clip(lo[i] + (j + frac) * width, vmin[i], vmax[i])
+        return out.reshape(self.shape + (len(q),))
+
+
+class MonteCarloEngine:
+    """
+    单台设备的蒙特卡洛不确定性分析：续航（各场景）与容量保持率
+    每个分块一次性向量化计算chunk_size组抽样，只累加直方图，内存与总抽样数无关；
+    第i个分块的随机数由SeedSequence(seed).spawn派生，结果与workers、完成顺序无关
+    """
+
+    def __init__(self, spec, uncertainty=DEFAULT_UNCERTAINTY, scenes=SCENES, T=298.15,
+                 SOC_0=100, threshold=1, bins=2000):
+        self.spec = spec
+        self.uncertainty = dict(uncertainty)
+        self.scenes = list(scenes)
+        self.bins = bins
+        model = DischargeModel(spec, self.scenes)
+        params = model.params
+        baseline = params['baseline']
+        # 各场景功率拆成 屏幕项 + CPU项 + 其它，再乘(1 + 耦合)
+        self.screen = np.array([params['coefficients'][sc]['s'] * baseline['P_s']
+                                for sc in self.scenes])
+        self.cpu = np.array([params['coefficients'][sc]['c'] * baseline['P_c'][sc]
+                             for sc in self.scenes])
+        self.rest = np.array([sum(params['coefficients'][sc][e] * baseline[p]
+                                  for e, p in _COMPONENTS if e != 's')
+                              for sc in self.scenes])
+        self.coupling = np.array([params['coupling'][sc] for sc in self.scenes])
+        self.aging_model = Aging(battery_type=spec['battery'].get('chemistry', 'Lipo'))
+        self.history = spec.get('history')
+        self.C_base = model.capacity * float(f_T_array(T))
+        self.W = max(float(runtime_integral(SOC_0) - runtime_integral(threshold)), 0.0)
+        self.point_runtime = np.array([model.time_to_empty(sc, SOC_0, T, threshold)
+                                       for sc in self.scenes])
+        self.point_retention = model.retention
+
+    def _retention(self, draws, n):
+        if self.history is None:
+            return np.ones(n)
+        history = self.history
+        overrides = {name: self.aging_model.params[name] * draws[name]
+                     for name in AGING_UNCERTAIN if name in draws}
+        model = self.aging_model.with_params(**overrides)
+        retention = model.capacity_degradation_array(
+            history['age_days'], history['cycles_completed'], history['avg_SOC'],
+            history['avg_temp'], history['DOD_avg'], history.get('dod_histogram'))
+        return np.broadcast_to(retention, (n,))
+
+    def evaluate(self, rng, n):
+        """
+        一个向量化批次
+        返回:
+            runtime (n, M) 小时, retention (n,)
+        """
+        draws = sample_multipliers(rng, self.uncertainty, n)
+        ones = np.ones(n)
+        screen = draws.get('brightness', ones)[:, None] * self.screen
+        cpu = draws.get('cpu_utilization', ones)[:, None] * self.cpu
+        coupling = draws.get('coupling', ones)[:, None] * self.coupling
+        power = (screen + cpu + self.rest) * (1 + coupling)
+        retention = self._retention(draws, n)
+        runtime = self.C_base * retention[:, None] * self.W / (100000 * power)
+        return runtime, retention
+
+    def histograms(self):
+        runtime = StreamingHistogram(0, 4 * self.point_runtime, self.bins, (len(self.scenes),))
+        retention = StreamingHistogram(0, 1, self.bins)
+        return runtime, retention
+
+    def run_chunk(self, seed, n):
+        """计算一个分块，返回(续航直方图, 保持率直方图)"""
+        runtime, retention = self.evaluate(np.random.default_rng(seed), n)
+        h_runtime, h_retention = self.histograms()
+        h_runtime.update(runtime)
+        h_retention.update(retention)
+        return h_runtime, h_retention
+
+    def run(self, n_samples, seed=0, chunk_size=4096, workers=1,
+            percentiles=DEFAULT_PERCENTILES):
+        """
+        n_samples: 总抽样数；workers>1时分块交给进程池（在途分块数有上限）
+        返回:
+            {'n', 'percentiles', 'runtime_h': {场景: [各分位数]}, 'runtime_mean_h': {...},
+             'retention': [各分位数], 'retention_mean'}
+        """
+        sizes = [min(chunk_size, n_samples - s) for s in range(0, n_samples, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        h_runtime, h_retention = self.histograms()
+        if workers <= 1:
+            results = (self.run_chunk(s, n) for s, n in zip(seeds, sizes))
+        else:
+            results = self._run_parallel(seeds, sizes, workers)
+        for r, t in results:
+            h_runtime.merge(r)
+            h_retention.merge(t)
+        runtime_q = h_runtime.percentile(percentiles)
+        return {
+            'n': n_samples,
+            'percentiles': list(percentiles),
+            'runtime_h': {sc: runtime_q[m].tolist() for m, sc in enumerate(self.scenes)},
+            'runtime_mean_h': dict(zip(self.scenes, h_runtime.mean().tolist())),
+            'retention': h_retention.percentile(percentiles).tolist(),
+            'retention_mean': float(h_retention.mean()),
+        }
+
+    def _run_parallel(self, seeds, sizes, workers):
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            tasks = iter(zip(seeds, sizes))
+            for s, n in itertools.islice(tasks, 2 * workers):
+                pending.append(pool.submit(self.run_chunk, s, n))
+            while pending:
+                yield pending.popleft().result()
+                for s, n in itertools.islice(tasks, 1):
+                    pending.append(pool.submit(self.run_chunk, s, n))
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description='续航与容量保持率的蒙特卡洛不确定性分析')
+    parser.add_argument('spec', nargs='?', help='设备规格JSON文件，默认使用batterymodel.specs')
+    parser.add_argument('-n', '--samples', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    parser.add_argument('--uncertainty', help='不确定参数JSON文件，{名称: [分布, 参数...]}')
+    args = parser.parse_args()
+    if args.spec:
+        with open(args.spec, encoding='utf-8') as f:
+            spec = json.load(f)
+    else:
+        from batterymodel import specs as spec
+    uncertainty = DEFAULT_UNCERTAINTY
+    if args.uncertainty:
+        with open(args.uncertainty, encoding='utf-8') as f:
+            uncertainty = json.load(f)
+    engine = MonteCarloEngine(spec, uncertainty)
+    print(json.dumps(engine.run(args.samples, args.seed, args.chunk_size, args.workers),
+                     ensure_ascii=False, indent=2))
@@ -0,0 +1,141 @@
+from bisect import bisect_right
+import numpy as np
+
+# 开路电压曲线V(s)为分段线性（s为SOC百分比），在95%处有跳变
+# 每段: V = V0 + slope*(s - knot)，累积能量 E(s) = ∫_0^s V du 在每段内为二次式
+_KNOTS = [0.0, 10.0, 20.0, 95.0]
+_V0 = [3.00, 3.50, 3.70, 4.20]
+_SLOPE = [0.05, 0.02, 0.35 / 75, -0.0075]
+_E0 = [0.0]
+for _k in range(len(_KNOTS) - 1):
+    _w = _KNOTS[_k + 1] - _KNOTS[_k]
+    _E0.append(_E0[-1] + _V0[_k] * _w + 0.5 * _SLOPE[_k] * _w ** 2)
+
+_KNOTS_ARR = np.array(_KNOTS)
+_V0_ARR = np.array(_V0)
+_SLOPE_ARR = np.array(_SLOPE)
+_E0_ARR = np.array(_E0)
+
+V_NOM = 3.7
+
+
+def _segment(SOC):
+    """SOC所在分段的下标（标量或数组）"""
+    if np.ndim(SOC) == 0:
+        return min(max(bisect_right(_KNOTS, SOC) - 1, 0), len(_KNOTS) - 1)
+    return np.clip(np.searchsorted(_KNOTS_ARR, SOC, side='right') - 1, 0, len(_KNOTS) - 1)
+
+
+def voltage(SOC):
+    """开路电压(V)，SOC为百分比，标量或数组"""
+    k = _segment(SOC)
+    if np.ndim(SOC) == 0:
+        return 3.0 if SOC <= 0 else _V0[k] + _SLOPE[k] * (SOC - _KNOTS[k])
+    SOC = np.asarray(SOC, dtype=float)
+    V = _V0_ARR[k] + _SLOPE_ARR[k] * (SOC - _KNOTS_ARR[k])
+    return np.where(SOC <= 0, 3.0, V)
+
+
+def soc_from_voltage(V):
+    """
+    开路电压反查SOC(%)：95%以下V(s)单调递增，按分段线性插值；
+    最上段(95-100%)单调递减，不低于其最低电压的按该段反解；落在95%跳变缺口内的取95
+    """
+    V = np.asarray(V, dtype=float)
+    top = len(_KNOTS) - 1
+    rise_V = [_V0[k] for k in range(top)]
+    rise_V.append(_V0[top - 1] + _SLOPE[top - 1] * (_KNOTS[top] - _KNOTS[top - 1]))
+    below = np.interp(V, rise_V, _KNOTS)
+    above = np.clip(_KNOTS[top] + (V - _V0[top]) / _SLOPE[top], _KNOTS[top], 100.0)
+    top_min = min(_V0[top], _V0[top] + _SLOPE[top] * (100.0 - _KNOTS[top]))
+    SOC = np.where(V >= top_min, above, np.where(V > rise_V[-1], _KNOTS[top], below))
+    return float(SOC) if SOC.ndim == 0 else SOC
+
+
+def voltage_slope(SOC):
+    """开路电压对SOC的导数dV/dSOC(V/%)，SOC<=0处为0"""
+    k = _segment(SOC)
+    if np.ndim(SOC) == 0:
+        return 0.0 if SOC <= 0 else _SLOPE[k]
+    return np.where(np.asarray(SOC) <= 0, 0.0, _SLOPE_ARR[k])
+
+
+def energy(SOC):
+    """
+    累积能量表：E(SOC) = ∫_0^SOC V(s) ds（精确值，按分段二次式查表）
+    """
+    k = _segment(SOC)
+    if np.ndim(SOC) == 0:
+        d = SOC - _KNOTS[k]
+        return _E0[k] + _V0[k] * d + 0.5 * _SLOPE[k] * d * d
+    d = np.asarray(SOC, dtype=float) - _KNOTS_ARR[k]
+    return _E0_ARR[k] + _V0_ARR[k] * d + 0.5 * _SLOPE_ARR[k] * d * d
+
+
+def f_SOC(SOC):
+    """
+    SOC容量因子：E(SOC)/(V_nom*SOC)，限制在[0.7, 1.0]；SOC<=0时为0.8
+    """
+    if np.ndim(SOC) == 0:
+        if SOC <= 0:
+            return 0.8
+        return max(0.7, min(1.0, energy(SOC) / (V_NOM * SOC)))
+    SOC = np.asarray(SOC, dtype=float)
+    safe = np.where(SOC > 0, SOC, 1.0)
+    f = np.clip(energy(SOC) / (V_NOM * safe), 0.7, 1.0)
+    return np.where(SOC <= 0, 0.8, f)
+
+
+def f_SOC_slope(SOC):
+    """
+    f_SOC对SOC的导数：(V·SOC - E)/(V_nom·SOC²)，截断区间与SOC<=0处为0
+    """
+    if np.ndim(SOC) == 0:
+        if SOC <= 0:
+            return 0.0
+        f = energy(SOC) / (V_NOM * SOC)
+        if f <= 0.7 or f >= 1.0:
+            return 0.0
+        return (voltage(SOC) * SOC - energy(SOC)) / (V_NOM * SOC * SOC)
+    SOC = np.asarray(SOC, dtype=float)
+    safe = np.where(SOC > 0, SOC, 1.0)
+    E = energy(SOC)
+    f = E / (V_NOM * safe)
+    slope = (voltage(SOC) * safe - E) / (V_NOM * safe * safe)
+    return np.where((SOC > 0) & (f > 0.7) & (f < 1.0), slope, 0.0)
+
+
+def _build_runtime_table(points_per_segment=4001):
+    """
+    W(s) = ∫_0^s f_SOC(u)·V(u) du 的累积表（逐段梯形积分，段端点取段内极限以处理95%处跳变）
+    """
+    edges = _KNOTS + [100.0]
+    grid, cum = [np.zeros(1)], [np.zeros(1)]
+    for k in range(len(_KNOTS)):
+        s = np.linspace(edges[k], edges[k + 1], points_per_segment)
+        d = s - _KNOTS[k]
+        V = _V0[k] + _SLOPE[k] * d
+        E = _E0[k] + _V0[k] * d + 0.5 * _SLOPE[k] * d * d
+        # s=0处取右极限E/s → V(0)，单点取值不影响积分
+        ratio = np.where(s > 0, E / np.where(s > 0, s, 1.0), V)
+        f = np.clip(ratio / V_NOM, 0.7, 1.0)
+        g = f * V
+        grid.append(s[1:])
+        cum.append(cum[-1][-1] + np.cumsum(0.5 * (g[1:] + g[:-1]) * np.diff(s)))
+    return np.concatenate(grid), np.concatenate(cum)
+
+
+_W_SOC, _W_TABLE = _build_runtime_table()
+
+
+def runtime_integral(SOC):
+    """
+    累积表W(SOC) = ∫_0^SOC f_SOC(s)·V(s) ds
+    恒功率下放电时间正比于W(SOC_0) - W(阈值)，与具体设备无关
+    """
+    return np.interp(SOC, _W_SOC, _W_TABLE)
+
+
+def soc_from_runtime_integral(W):
+    """runtime_integral的反函数（W关于SOC严格单调递增）"""
+    return np.interp(W, _W_TABLE, _W_SOC)
@@ -93,3 +93,24 @@ class Paras:
         base = base_coupling_percent[scene]
         
         return base*cooling
+
+    def estimate_thermal_resistance(cooling_design):
+        """
+        估算整机到环境的热阻(K/W)
+        基于：稳态温升 ΔT = P_total × R_thermal（游戏负载约5W时温升15-20K）
+        """
+        thermal_resistance = {
+            'passive_basic': 5.0,      # 基本被动散热
+            'passive_advanced': 4.0,   # 增强被动散热
+            'vapor_chamber': 3.0,      # 均热板
+            'active_cooling': 2.0      # 主动散热（游戏手机）
+        }
+        return thermal_resistance.get(cooling_design, 5.0)
+
+    def estimate_heat_capacity(screen_size):
+        """
+        估算整机热容(J/K)
+        基于：整机质量随屏幕尺寸增长，等效比热约1000 J/(kg·K)
+        """
+        mass_kg = 0.03 * screen_size   # 6.1英寸约0.18kg
+        return mass_kg * 1000
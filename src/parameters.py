@@ -1,6 +1,113 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 from paraestimate import Paras
 from pinformation import PInformation
 
+# 参数估算实际读取的规格字段（name、battery、history不影响参数）
+PARAMETER_FIELDS = ('screen', 'chip', 'network', 'cooling', 'os')
+
+
+def _canonical(obj):
+    """
+    规范化为可哈希的嵌套元组：数值统一为float，字典按键排序，
+    以免6.1与6.10、1000与1000.0得到不同的键
+    """
+    if isinstance(obj, dict):
+        return tuple((str(k), _canonical(obj[k])) for k in sorted(obj, key=str))
+    if isinstance(obj, (list, tuple)):
+        return ('__seq__',) + tuple(_canonical(v) for v in obj)
+    if isinstance(obj, bool) or obj is None:
+        return obj
+    if isinstance(obj, (int, float)):
+        return float(obj)
+    if hasattr(obj, 'dtype') and hasattr(obj, 'tobytes'):
+        # numpy数组/标量（不导入numpy）：str()只保留8位有效数字且会省略长数组
+        if obj.ndim == 0 and obj.dtype.kind in 'biuf':
+            return bool(obj) if obj.dtype.kind == 'b' else float(obj)
+        return ('__nd__', obj.dtype.str, tuple(obj.shape), obj.tobytes())
+    return str(obj)
+
+
+def spec_key(specs):
+    """规格的规范化键（进程内缓存用）"""
+    return tuple(_canonical(specs.get(f)) for f in PARAMETER_FIELDS)
+
+
+def spec_fingerprint(specs):
+    """规格指纹：规范化键的SHA1，跨进程/持久化时使用"""
+    return hashlib.sha1(repr(spec_key(specs)).encode('utf-8')).hexdigest()
+
+
+class FrozenDict(dict):
+    """
+    只读字典：修改操作抛出TypeError
+    仍是dict子类，可pickle（进程池）与json.dumps；deepcopy得到可修改的普通字典
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        """深拷贝与共享缓存无关，返回可修改的普通字典"""
+        return {k: copy.deepcopy(v, memo) for k, v in self.items()}
+
+
+def _freeze(obj):
+    """递归转为只读字典，防止调用方改坏共享的缓存项"""
+    if isinstance(obj, dict):
+        return FrozenDict({k: _freeze(v) for k, v in obj.items()})
+    return obj
+
+
+class ParameterCache:
+    """按规格指纹缓存参数估算结果的有界LRU（线程安全）"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, specs):
+        key = spec_key(specs)
+        with self._lock:
+            params = self._entries.get(key)
+            if params is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return params
+            self.misses += 1
+        params = _freeze(PhoneParameterEstimator(specs).estimate_all_parameters())
+        with self._lock:
+            self._entries[key] = params
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return params
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
 class PhoneParameterEstimator:
     """手机参数估算器"""
     
@@ -19,6 +126,16 @@ class PhoneParameterEstimator:
         """
         self.specs = specs
         self.PIn=PInformation(specs)
+
+    @staticmethod
+    def cached(specs):
+        """带缓存的estimate_all_parameters，返回只读的共享结果"""
+        return _PARAMETER_CACHE.get(specs)
+
+    @staticmethod
+    def cache_clear():
+        """清空cached的共享缓存（如基准测试需要冷缓存时）"""
+        _PARAMETER_CACHE.clear()
     
     def estimate_all_parameters(self):
         """估算所有参数"""
@@ -54,6 +171,9 @@ class PhoneParameterEstimator:
             'M': self.estimate_coupling('M')
         }
         
+        # 4. 集总热模型参数
+        params['thermal'] = self.estimate_thermal()
+        
         return params
     
     def estimate_coefficients(self, scene):
@@ -98,3 +218,13 @@ class PhoneParameterEstimator:
     def estimate_coupling(self, scene):
         cooling = self.specs.get('cooling', 'passive_basic')
         return Paras.estimate_thermal_coupling(scene, cooling)
+    
+    def estimate_thermal(self):
+        cooling = self.specs.get('cooling', 'passive_basic')
+        return {
+            'R_th': Paras.estimate_thermal_resistance(cooling),
+            'C_th': Paras.estimate_heat_capacity(self.specs['screen'].get('size', 6.1))
+        }
+
+
+_PARAMETER_CACHE = ParameterCache()
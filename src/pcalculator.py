@@ -1,86 +1,217 @@
+from collections import namedtuple
 import numpy as np
 from scipy.optimize import least_squares
+from scipy.sparse import csr_matrix
+from pinformation import PInformation
 
-def solve_power_from_runtime(runtime_B, runtime_V, runtime_G, runtime_M, 
+SCENES = ('B', 'V', 'G', 'M')
+# 各场景功率模型: P_j = LINEAR[j]·[P_s, P_c, P_n, P_g, P_b] + CN[j]·P_c·P_n + SC[j]·P_s·P_c
+LINEAR = np.array([
+    [0.7, 0.5, 0.3, 0.2, 1.0],
+    [1.0, 0.4, 1.0, 0.0, 1.1],
+    [1.2, 1.0, 0.4, 0.5, 0.9],
+    [0.9, 0.7, 0.6, 0.3, 1.0],
+])
+CN = np.array([0.0075, 0.0, 0.0, 0.0126])
+SC = np.array([0.0, 0.012, 0.048, 0.0126])
+# 软约束：P_s >= 0.1, P_c >= 0.5（作为残差项）
+FLOOR = np.array([0.1, 0.5])
+DEFAULT_GUESS = np.array([0.5, 2.0, 1.0, 0.3, 0.2])
+N_PARAMS = 5
+N_RESIDUALS = 6
+# 逐手机收敛判据：投影梯度的无穷范数
+GTOL = 1e-10
+
+# powers: (N, 5) 求解的基准功率[P_s, P_c, P_n, P_g, P_b]
+# target/fitted: (N, 4) 由续航估算的场景功率与模型计算值
+# cost: (N,) 各手机的0.5·Σ残差²；success: (N,) 各手机的投影梯度是否收敛到GTOL以内
+CalibrationResult = namedtuple('CalibrationResult', ['powers', 'target', 'fitted', 'cost', 'success'])
+
+
+def scene_power_from_runtime(runtimes, battery_capacity=3700, voltage_avg=3.8):
+    """
+    续航时间(小时，(N, 4)按B/V/G/M) → 各场景平均功率(W)
+    电池总能量(Wh) = 容量 × 平均电压 / 1000
+    """
+    E_total = np.asarray(battery_capacity, dtype=float) * voltage_avg / 1000
+    return np.atleast_1d(E_total)[:, None] / np.atleast_2d(runtimes)
+
+
+def scene_power(powers):
+    """功率模型，powers为(N, 5)，返回(N, 4)"""
+    P_s, P_c, P_n = powers[:, 0:1], powers[:, 1:2], powers[:, 2:3]
+    return powers @ LINEAR.T + CN * P_c * P_n + SC * P_s * P_c
+
+
+def _residuals(x, target):
+    powers = x.reshape(-1, N_PARAMS)
+    r = np.empty((len(powers), N_RESIDUALS))
+    r[:, :4] = scene_power(powers) - target
+    r[:, 4:] = powers[:, :2] - FLOOR
+    return r.ravel()
+
+
+def _jacobian_pattern(n):
+    """块对角稀疏结构：每台手机6×5的稠密块"""
+    rows = np.arange(n)[:, None, None] * N_RESIDUALS + np.arange(N_RESIDUALS)[None, :, None]
+    cols = np.arange(n)[:, None, None] * N_PARAMS + np.arange(N_PARAMS)[None, None, :]
+    rows, cols = np.broadcast_arrays(rows, cols)
+    return rows.ravel(), cols.ravel()
+
+
+def _jacobian_blocks(powers):
+    """各手机的6×5雅可比块，(N, 6, 5)"""
+    n = len(powers)
+    P_s, P_c, P_n = powers[:, 0:1], powers[:, 1:2], powers[:, 2:3]
+    J = np.zeros((n, N_RESIDUALS, N_PARAMS))
+    J[:, :4, :] = LINEAR
+    J[:, :4, 0] += SC * P_c
+    J[:, :4, 1] += CN * P_n + SC * P_s
+    J[:, :4, 2] += CN * P_c
+    J[:, 4, 0] = 1.0
+    J[:, 5, 1] = 1.0
+    return J
+
+
+def _jacobian(x, target, pattern):
+    J = _jacobian_blocks(x.reshape(-1, N_PARAMS))
+    n = len(J)
+    shape = (n * N_RESIDUALS, n * N_PARAMS)
+    return csr_matrix((J.ravel(), pattern), shape=shape)
+
+
+def _block_state(powers, target, lo, hi):
+    """各手机的(残差, 代价, 梯度, 投影梯度无穷范数)"""
+    r = _residuals(powers.ravel(), target).reshape(-1, N_RESIDUALS)
+    J = _jacobian_blocks(powers)
+    g = np.einsum('nrp,nr->np', J, r)
+    # 贴在边界上且梯度指向外侧的分量不计入
+    blocked = ((powers <= lo) & (g > 0)) | ((powers >= hi) & (g < 0))
+    pg = np.abs(np.where(blocked, 0.0, g)).max(axis=1)
+    return r, 0.5 * (r ** 2).sum(axis=1), J, g, blocked, pg
+
+
+def _polish(powers, target, lo, hi, gtol=GTOL, max_iter=50):
+    """
+    逐手机的投影Levenberg-Marquardt精修（所有手机的5×5法方程一次批量求解）
+    批量least_squares的停止判据作用于整体，单台手机的结果会随同批其它手机变化；
+    这里对每个块单独检验投影梯度，使结果与同批成员无关
+    返回:
+        (powers, cost, success)
+    """
+    powers = powers.copy()
+    lam = np.full(len(powers), 1e-6)
+    r, cost, J, g, blocked, pg = _block_state(powers, target, lo, hi)
+    eye = np.eye(N_PARAMS)
+    for _ in range(max_iter):
+        active = pg > gtol
+        if not active.any():
+            break
+        # 被边界挡住的变量固定不动
+        free = ~blocked[active]
+        Ja = J[active] * free[:, None, :]
+        A = np.einsum('nrp,nrq->npq', Ja, Ja)
+        A += (lam[active][:, None] * np.maximum(np.diagonal(A, axis1=1, axis2=2), 1e-12)
+              + ~free)[:, :, None] * eye
+        step = np.linalg.solve(A, -(g[active] * free)[..., None])[..., 0]
+        trial = np.clip(powers[active] + step, lo[active], hi[active])
+        trial_cost = 0.5 * (_residuals(trial.ravel(), target[active])
+                            .reshape(-1, N_RESIDUALS) ** 2).sum(axis=1)
+        # 接近最优时代价的下降低于浮点分辨率，允许舍入量级的持平
+        better = trial_cost <= cost[active] * (1 + 1e-12)
+        idx = np.flatnonzero(active)
+        powers[idx[better]] = trial[better]
+        lam[idx] = np.where(better, lam[idx] * 0.1, lam[idx] * 10)
+        r, cost, J, g, blocked, pg = _block_state(powers, target, lo, hi)
+    return powers, cost, pg <= gtol
+
+
+def warm_start(chips=None, n=None):
+    """
+    初始猜测：P_c取PInformation芯片档案的'medium'功耗，其余取默认值
+    chips: 芯片名列表（未知芯片用默认值）；不给时生成n份默认猜测
+    """
+    n = len(chips) if chips is not None else n
+    x0 = np.tile(DEFAULT_GUESS, (n, 1))
+    if chips is not None:
+        profiles = PInformation({}).SOC_POWER_PROFILES
+        for i, chip in enumerate(chips):
+            if chip in profiles:
+                x0[i, 1] = profiles[chip]['medium']
+    return x0
+
+
+def calibrate_powers(runtimes, battery_capacity=3700, voltage_avg=3.8, chips=None, x0=None,
+                     bounds=(0, 10)):
+    """
+    批量由续航反推基准功率：所有手机在一次least_squares中求解，
+    雅可比为解析的块对角稀疏矩阵；之后逐块精修到投影梯度不超过GTOL，
+    各手机的结果、cost与success与同批还有哪些手机无关
+    runtimes: (N, 4) 各场景续航（小时，B/V/G/M）
+    battery_capacity: 标量或(N,) mAh
+    chips: 可选芯片名列表，用于热启动；x0: 可选(N, 5)初始值（如上次拟合结果）
+    返回:
+        CalibrationResult
+    """
+    target = scene_power_from_runtime(runtimes, battery_capacity, voltage_avg)
+    n = len(target)
+    if x0 is None:
+        x0 = warm_start(chips, n)
+    x0 = np.clip(np.asarray(x0, dtype=float), bounds[0], bounds[1]).ravel()
+    pattern = _jacobian_pattern(n)
+    result = least_squares(_residuals, x0, jac=lambda x, t: _jacobian(x, t, pattern),
+                           bounds=bounds, method='trf', tr_solver='lsmr', x_scale='jac',
+                           args=(target,))
+    lo, hi = (np.broadcast_to(np.asarray(bound, dtype=float), x0.shape).reshape(n, N_PARAMS)
+              for bound in bounds)
+    powers, cost, success = _polish(result.x.reshape(n, N_PARAMS), target, lo, hi)
+    return CalibrationResult(powers, target, scene_power(powers), cost,
+                             success & (result.status >= 0))
+
+
+def solve_power_from_runtime(runtime_B, runtime_V, runtime_G, runtime_M,
                              battery_capacity=3700, voltage_avg=3.8):
     """
-    从续航时间反推基准功率
+    从续航时间反推基准功率（单台手机）
     runtime_X: 各场景续航时间（小时）
+    返回:
+        [P_s, P_c, P_n, P_g, P_b]，求解失败返回None
     """
-    # 电池总能量（Wh）
-    E_total = battery_capacity * voltage_avg / 1000
-    
-    # 各场景平均功率
-    P_B_est = E_total / runtime_B
-    P_V_est = E_total / runtime_V
-    P_G_est = E_total / runtime_G
-    P_M_est = E_total / runtime_M
-    
+    result = calibrate_powers([[runtime_B, runtime_V, runtime_G, runtime_M]],
+                              battery_capacity, voltage_avg)
+    return result.powers[0] if result.success[0] else None
+
+
+def report_power_solution(result, index=0):
+    """打印单台手机的求解结果"""
+    target, fitted = result.target[index], result.fitted[index]
     print(f"估算的各场景功率：")
-    print(f"  P_B ≈ {P_B_est:.2f} W")
-    print(f"  P_V ≈ {P_V_est:.2f} W")
-    print(f"  P_G ≈ {P_G_est:.2f} W")
-    print(f"  P_M ≈ {P_M_est:.2f} W")
-    
-    # 定义残差函数（非线性最小二乘）
-    def residuals(params):
-        P_s, P_c, P_n, P_g, P_b = params
-        
-        # 计算各场景功率
-        P_B_calc = 0.7*P_s + 0.5*P_c + 0.3*P_n + 0.2*P_g + P_b + 0.0075*P_c*P_n
-        P_V_calc = 1.0*P_s + 0.4*P_c + 1.0*P_n + 1.1*P_b + 0.012*P_s*P_c
-        P_G_calc = 1.2*P_s + 1.0*P_c + 0.4*P_n + 0.5*P_g + 0.9*P_b + 0.048*P_s*P_c
-        P_M_calc = 0.9*P_s + 0.7*P_c + 0.6*P_n + 0.3*P_g + P_b + 0.0126*P_c*P_n + 0.0126*P_s*P_c
-        
-        return [
-            P_B_calc - P_B_est,
-            P_V_calc - P_V_est,
-            P_G_calc - P_G_est,
-            P_M_calc - P_M_est,
-            # 可添加约束：所有功率 > 0
-            P_s - 0.1,  # 约束：P_s >= 0.1
-            P_c - 0.5,  # 约束：P_c >= 0.5
-        ]
-    
-    # 初始猜测
-    initial_guess = [0.5, 2.0, 1.0, 0.3, 0.2]
-    
-    # 求解
-    result = least_squares(residuals, initial_guess, bounds=(0, 10))
-    
-    if result.success:
-        P_s, P_c, P_n, P_g, P_b = result.x
-        print(f"\n求解的基准功率：")
-        print(f"  P_s(屏幕) = {P_s:.3f} W")
-        print(f"  P_c(CPU)  = {P_c:.3f} W")
-        print(f"  P_n(网络) = {P_n:.3f} W")
-        print(f"  P_g(GPS)  = {P_g:.3f} W")
-        print(f"  P_b(后台) = {P_b:.3f} W")
-        
-        # 验证
-        print(f"\n验证（计算值 vs 估算值）：")
-        P_B_calc = 0.7*P_s + 0.5*P_c + 0.3*P_n + 0.2*P_g + P_b + 0.0075*P_c*P_n
-        P_V_calc = 1.0*P_s + 0.4*P_c + 1.0*P_n + 1.1*P_b + 0.012*P_s*P_c
-        P_G_calc = 1.2*P_s + 1.0*P_c + 0.4*P_n + 0.5*P_g + 0.9*P_b + 0.048*P_s*P_c
-        P_M_calc = 0.9*P_s + 0.7*P_c + 0.6*P_n + 0.3*P_g + P_b + 0.0126*P_c*P_n + 0.0126*P_s*P_c
-        
-        print(f"  P_B: {P_B_calc:.3f} W (估算: {P_B_est:.3f} W)")
-        print(f"  P_V: {P_V_calc:.3f} W (估算: {P_V_est:.3f} W)")
-        print(f"  P_G: {P_G_calc:.3f} W (估算: {P_G_est:.3f} W)")
-        print(f"  P_M: {P_M_calc:.3f} W (估算: {P_M_est:.3f} W)")
-        
-        return result.x
-    else:
+    for scene, P in zip(SCENES, target):
+        print(f"  P_{scene} ≈ {P:.2f} W")
+    if not result.success[index]:
         print("求解失败！")
-        return None
-
-# 示例：假设某手机实测续航
-# iPhone 14 Pro 实测数据（假设）
-solve_power_from_runtime(
-    runtime_B=12.0,  # 浏览12小时
-    runtime_V=8.5,   # 视频8.5小时
-    runtime_G=5.0,   # 游戏5小时
-    runtime_M=9.0,   # 综合9小时
-    battery_capacity=3200,
-    voltage_avg=3.85
-)
+        return
+    P_s, P_c, P_n, P_g, P_b = result.powers[index]
+    print(f"\n求解的基准功率：")
+    print(f"  P_s(屏幕) = {P_s:.3f} W")
+    print(f"  P_c(CPU)  = {P_c:.3f} W")
+    print(f"  P_n(网络) = {P_n:.3f} W")
+    print(f"  P_g(GPS)  = {P_g:.3f} W")
+    print(f"  P_b(后台) = {P_b:.3f} W")
+    print(f"\n验证（计算值 vs 估算值）：")
+    for scene, calc, est in zip(SCENES, fitted, target):
+        print(f"  P_{scene}: {calc:.3f} W (估算: {est:.3f} W)")
+
+
+if __name__ == '__main__':
+    # 示例：假设某手机实测续航
+    # iPhone 14 Pro 实测数据（假设）
+    report_power_solution(calibrate_powers(
+        [[12.0,   # 浏览12小时
+          8.5,    # 视频8.5小时
+          5.0,    # 游戏5小时
+          9.0]],  # 综合9小时
+        battery_capacity=3200,
+        voltage_avg=3.85,
+        chips=['A16']
+    ))
@@ -0,0 +1,122 @@
+import time
+from contextlib import contextmanager
+from functools import partial
+
+# 放电模拟中计时的阶段（顺序即报告顺序，其它阶段名排在后面）
+PHASES = ('estimate', 'degradation', 'power', 'thermal', 'capacity_integral', 'current', 'step',
+          'record')
+
+_active = None
+
+
+class PhaseStats:
+    """
+    分阶段计时与调用计数
+    热循环中的用法: stats.mark()开始计时，stats.lap(阶段)把距上次mark/lap的时间记入该阶段
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+        self._last = time.perf_counter()
+
+    def mark(self):
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.add(phase, now - self._last)
+        self._last = now
+
+    def add(self, phase, seconds, calls=1):
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def merge(self, other):
+        """合并另一份统计（PhaseStats或as_dict()的结果，如来自工作进程）"""
+        if isinstance(other, PhaseStats):
+            other = other.as_dict()
+        for phase, entry in other.items():
+            self.add(phase, entry['seconds'], entry['calls'])
+        return self
+
+    def phases(self):
+        known = [p for p in PHASES if p in self.calls]
+        return known + sorted(p for p in self.calls if p not in PHASES)
+
+    def as_dict(self):
+        """{阶段: {'calls': 次数, 'seconds': 总耗时}}，可JSON序列化、可跨进程传递"""
+        return {p: {'calls': self.calls[p], 'seconds': self.seconds[p]} for p in self.phases()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls().merge(data)
+
+    def total(self):
+        return sum(self.seconds.values())
+
+    def report(self):
+        total = self.total() or 1.0
+        lines = [f"{'phase':<20}{'calls':>10}{'total ms':>12}{'mean us':>10}{'share':>8}"]
+        for p in self.phases():
+            calls, seconds = self.calls[p], self.seconds[p]
+            lines.append(f"{p:<20}{calls:>10}{seconds * 1000:>12.3f}"
+                         f"{seconds / calls * 1e6:>10.2f}{seconds / total:>8.1%}")
+        return '\n'.join(lines)
+
+
+def active():
+    """当前启用的PhaseStats，未启用时为None（被计时代码只需判断一次）"""
+    return _active
+
+
+def enable(stats=None):
+    """启用统计并返回统计对象"""
+    global _active
+    _active = stats if stats is not None else PhaseStats()
+    return _active
+
+
+def disable():
+    """关闭统计，返回关闭前的统计对象"""
+    global _active
+    stats, _active = _active, None
+    return stats
+
+
+@contextmanager
+def profile(stats=None):
+    """
+    with profile() as stats: ... 范围内启用统计，退出后恢复之前的状态
+    """
+    global _active
+    previous = _active
+    stats = enable(stats)
+    try:
+        yield stats
+    finally:
+        _active = previous
+
+
+def profiled(func, *args, **kwargs):
+    """启用统计运行func，返回(结果, 统计字典)，供进程池工作进程使用"""
+    with profile() as stats:
+        result = func(*args, **kwargs)
+    return result, stats.as_dict()
+
+
+def wrap(func, stats):
+    """
+    提交到进程池前包装任务：stats不为None时工作进程同样计时
+    （结果变为(结果, 统计字典)，取回时交给unwrap）
+    """
+    return func if stats is None else partial(profiled, func)
+
+
+def unwrap(result, stats):
+    """取回wrap任务的结果，并把工作进程的统计合并进stats"""
+    if stats is None:
+        return result
+    result, worker_stats = result
+    stats.merge(worker_stats)
+    return result
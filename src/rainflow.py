@@ -0,0 +1,106 @@
+from dependencies import Dependencies
+
+# 惰性导入：构造计数器时才加载numpy
+np=Dependencies.get_numpy()
+
+
+class RainflowCounter:
+    """
+    流式雨流计数（ASTM E1049三点法）
+    逐块输入SOC样本，只保留转折点栈，内存与样本数无关
+    """
+
+    def __init__(self, bins=20):
+        self.bin_edges = np.linspace(0, 1, bins + 1)   # 放电深度DOD(0-1)分箱
+        self.counts = np.zeros(bins)                    # 各箱已闭合的循环数
+        self.range_sum = 0.0                            # Σ 循环数×幅值(%)
+        self.cycles = 0.0
+        self._stack = []
+        self._last = None
+        self._direction = 0
+
+    def _count(self, rng, n):
+        # 直接算箱号：幅值恰在边界上（如整数%的SOC）时计入上一箱，1e-9吸收浮点误差
+        bins = len(self.counts)
+        k = min(int(np.floor(rng * bins / 100 + 1e-9)), bins - 1)
+        self.counts[k] += n
+        self.range_sum += n * rng
+        self.cycles += n
+
+    def _push(self, point):
+        stack = self._stack
+        stack.append(point)
+        while len(stack) >= 3:
+            X = abs(stack[-1] - stack[-2])
+            Y = abs(stack[-2] - stack[-3])
+            if X < Y:
+                break
+            if len(stack) == 3:
+                # Y包含起点：计半个循环并丢弃起点
+                self._count(Y, 0.5)
+                del stack[0]
+            else:
+                self._count(Y, 1.0)
+                del stack[-3:-1]
+
+    def update(self, soc):
+        """输入一块SOC样本(%)"""
+        soc = np.asarray(soc, dtype=float).ravel()
+        if len(soc) == 0:
+            return
+        if self._last is None:
+            self._push(soc[0])
+            pts = soc
+        else:
+            pts = np.concatenate(([self._last], soc))
+        d = np.sign(np.diff(pts))
+        moves = np.flatnonzero(d)
+        if len(moves):
+            dn = d[moves]
+            prev = np.concatenate(([self._direction], dn[:-1]))
+            # 方向反转处，上一段的终点即转折点
+            turning = moves[(prev != 0) & (dn != prev)]
+            for point in pts[turning]:
+                self._push(point)
+            self._direction = dn[-1]
+        self._last = pts[-1]
+
+    def _residue(self):
+        """尚未闭合的转折点序列（含当前末点）"""
+        residue = list(self._stack)
+        if self._last is not None and (not residue or residue[-1] != self._last):
+            residue.append(self._last)
+        return residue
+
+    def histogram(self):
+        """
+        DOD直方图（残余序列按半循环计入，不改变计数器状态）
+        返回:
+            {'dod': 箱中心, 'counts': 循环数, 'edges': 箱边界}
+        """
+        counter = RainflowCounter(len(self.counts))
+        residue = self._residue()
+        for a, b in zip(residue[:-1], residue[1:]):
+            counter._count(abs(b - a), 0.5)
+        return {
+            'dod': 0.5 * (self.bin_edges[1:] + self.bin_edges[:-1]),
+            'counts': self.counts + counter.counts,
+            'edges': self.bin_edges,
+        }
+
+    def summary(self):
+        """
+        返回:
+            cycles: 雨流循环数（含残余半循环），对应Aging的cycles_completed
+            DOD_avg: 循环幅值的平均放电深度
+            equivalent_full_cycles: Σ 循环数×DOD
+        """
+        residue = self._residue()
+        half = [abs(b - a) for a, b in zip(residue[:-1], residue[1:])]
+        cycles = self.cycles + 0.5 * len(half)
+        range_sum = self.range_sum + 0.5 * sum(half)
+        return {
+            'cycles': float(cycles),
+            'DOD_avg': float(range_sum / cycles / 100) if cycles else 0.0,
+            'equivalent_full_cycles': float(range_sum / 100),
+        }
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from parameters import _canonical
+from catalog import get_catalog
+from discharge import DischargeModel, spec_retention
+
+try:
+    import fcntl
+except ImportError:  # 非POSIX平台：退化为单进程使用
+    fcntl = None
+
+# 模型版本：放电/老化模型的结果发生变化时递增，使旧缓存全部失效
+MODEL_VERSION = 1
+
+
+def result_key(kind, spec, **params):
+    """
+    内容寻址的键：完整规格（含电池与历史）+ 计算参数 + 设备目录内容 + 模型版本的SHA1
+    """
+    payload = (MODEL_VERSION, get_catalog().fingerprint, kind, _canonical(spec),
+               _canonical(params))
+    return hashlib.sha1(repr(payload).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    磁盘结果缓存：每个结果一个.npy文件（目录按键的前两位分桶）
+    - 写入先写临时文件再os.replace，读者不会看到半个文件
+    - 命中时更新文件mtime，超出max_bytes时按mtime淘汰最久未用的条目（LRU）
+    - 写入与淘汰持有目录锁(flock)，多个工作进程可共享同一目录
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, '.lock')
+        self._size_path = os.path.join(directory, '.size')
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.npy')
+
+    @contextmanager
+    def _locked(self):
+        with open(self._lock_path, 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_size(self):
+        try:
+            with open(self._size_path) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return self._scan_size()
+
+    def _write_size(self, total):
+        with open(self._size_path, 'w') as f:
+            f.write(str(total))
+
+    def _entries(self):
+        """[(mtime, 大小, 路径)]"""
+        entries = []
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.npy'):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """删除最久未用的条目直到总大小不超过max_bytes的90%，返回剩余大小（需持有锁）"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = 0.9 * self.max_bytes
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def get(self, key):
+        """命中返回数组，否则返回None"""
+        path = self._path(key)
+        try:
+            array = np.load(path, allow_pickle=False)
+        except (FileNotFoundError, ValueError, EOFError):
+            # 不存在、或刚被其它进程淘汰
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return array
+
+    def put(self, key, array):
+        array = np.asarray(array)
+        path = self._path(key)
+        bucket = os.path.dirname(path)
+        os.makedirs(bucket, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=bucket, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+            size = os.path.getsize(tmp)
+            with self._locked():
+                total = self._read_size()
+                replaced = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp, path)
+                total += size - replaced
+                if total > self.max_bytes:
+                    total = self._evict()
+                self._write_size(total)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return array
+
+    def get_or_compute(self, key, compute):
+        """命中时直接读文件，否则调用compute()计算并写入"""
+        array = self.get(key)
+        if array is None:
+            array = self.put(key, compute())
+        return array
+
+    def soc(self, spec, t, dt=600, SOC_0=100, T=298.15, scene='B', dtype=np.float64):
+        """SOC轨迹（同DischargeModel.simulate）"""
+        dtype = np.dtype(dtype)
+        key = result_key('soc', spec, t=t, dt=dt, SOC_0=SOC_0, T=T, scene=scene, dtype=dtype.str)
+        return self.get_or_compute(
+            key, lambda: DischargeModel(spec, (scene,)).simulate(t, dt, SOC_0, T, scene, dtype))
+
+    def capacity_degradation(self, spec):
+        """容量保持率（同discharge.spec_retention）"""
+        key = result_key('retention', spec)
+        return float(self.get_or_compute(key, lambda: np.float64(spec_retention(spec))))
+
+    def stats(self):
+        with self._locked():
+            total = self._read_size()
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': total,
+                'max_bytes': self.max_bytes}
+
+    def clear(self):
+        with self._locked():
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._write_size(0)
@@ -0,0 +1,114 @@
+import numpy as np
+from discharge import f_T_array, spec_retention
+from ocvcurve import voltage, voltage_slope, f_SOC, f_SOC_slope, soc_from_voltage
+
+# 默认噪声与模型参数
+#   R_0  欧姆内阻(Ω)，端电压 = OCV(SOC) - I·R_0
+#   q    过程噪声（SOC方差增长率，%²/h），吸收电流计量误差与容量模型误差
+#   r    电压测量噪声方差(V²)
+#   P_0  初始SOC方差(%²)：初值未知时取中点50%、标准差30%
+#   gate 残差门限（残差标准差的倍数），超出时按电压反查SOC重新初始化
+DEFAULT_R_0 = 0.08
+DEFAULT_Q = 1.0
+DEFAULT_R = 0.01 ** 2
+DEFAULT_P_0 = 30.0 ** 2
+DEFAULT_GATE = 5.0
+
+
+def _column(value, n):
+    return np.ascontiguousarray(np.broadcast_to(np.asarray(value, dtype=float), (n,)))
+
+
+class SOCEstimator:
+    """
+    多台设备的在线SOC估计（扩展卡尔曼滤波，状态为SOC百分比）
+    预测: SOC ← SOC - 100·I·dt/3600 / C_eff(SOC)，C_eff = C_0·retention·f_T(T)·f_SOC(SOC)
+    校正: 端电压 V = OCV(SOC) - I·R_0，H = dOCV/dSOC
+    OCV在95%处跳变（上方斜率为负），线性化跨不过去：残差超过gate倍标准差时
+    直接由 OCV ≈ V + I·R_0 反查SOC并按电压噪声重置方差
+    每台设备的状态只有SOC与方差P，全部存成(N,)连续数组；
+    update每个采样O(1)时间、O(1)内存，一次调用推进全部（或rows指定的部分）设备
+    """
+
+    def __init__(self, capacity, retention=1.0, SOC_0=50, P_0=DEFAULT_P_0, T=298.15,
+                 R_0=DEFAULT_R_0, q=DEFAULT_Q, r=DEFAULT_R, gate=DEFAULT_GATE):
+        n = np.size(capacity)
+        self.C_base = _column(capacity, n) * _column(retention, n)
+        self.T = _column(T, n)
+        self.R_0 = _column(R_0, n)
+        self.q = _column(q, n)
+        self.r = _column(r, n)
+        self.gate = _column(gate, n)
+        self.SOC = _column(SOC_0, n)
+        self.P = _column(P_0, n)
+        self.innovation = np.zeros(n)   # 最近一次的电压残差(V)，用于监控
+
+    @classmethod
+    def from_specs(cls, specs, **kwargs):
+        """按规格的标称容量与历史老化后的保持率构造（不做参数估算）"""
+        capacity = np.array([float(s['battery']['capacity']) for s in specs])
+        retention = np.array([spec_retention(s) for s in specs])
+        return cls(capacity, retention, **kwargs)
+
+    def __len__(self):
+        return len(self.SOC)
+
+    def update(self, current, volts, dt, T=None, rows=None):
+        """
+        推进一个采样间隔并用端电压校正
+        current: 放电电流(mA，充电为负)；volts: 端电压(V)，nan表示本次无电压只做预测
+        dt: 采样间隔(s)；T: 电池温度(K)，给定时更新并保留
+        rows: 本次有采样的设备下标，None为全部；其余参数与rows同长或为标量
+        返回:
+            更新后的SOC（rows给定时只含这些设备）
+        """
+        if rows is None:
+            rows = slice(None)
+        if T is not None:
+            self.T[rows] = T
+        SOC, P = self.SOC[rows], self.P[rows]
+        current = np.asarray(current, dtype=float)
+        dt = np.asarray(dt, dtype=float)
+
+        # 预测：库仑计数，F = ∂SOC'/∂SOC
+        f = f_SOC(SOC)
+        step = 100 * current * dt / 3600 / (self.C_base[rows] * f_T_array(self.T[rows]) * f)
+        F = 1 + step * f_SOC_slope(SOC) / f
+        SOC = np.clip(SOC - step, 0, 100)
+        P = F * F * P + self.q[rows] * dt / 3600
+
+        # 校正：无电压的设备K=0
+        innovation = volts - (voltage(SOC) - current / 1000 * self.R_0[rows])
+        observed = ~np.isnan(innovation)
+        innovation = np.where(observed, innovation, 0.0)
+        H = voltage_slope(SOC)
+        r = self.r[rows]
+        S = H * H * P + r
+        K = np.where(observed, P * H / S, 0.0)
+        reset = observed & (innovation * innovation > self.gate[rows] ** 2 * S)
+        SOC = np.clip(SOC + K * innovation, 0, 100)
+        P = (1 - K * H) * P
+        if reset.any():
+            SOC_v = soc_from_voltage(volts + current / 1000 * self.R_0[rows])
+            H_v = np.maximum(np.abs(voltage_slope(SOC_v)), 1e-3)
+            SOC = np.where(reset, SOC_v, SOC)
+            P = np.where(reset, np.minimum(r / (H_v * H_v), DEFAULT_P_0), P)
+
+        self.SOC[rows] = SOC
+        self.P[rows] = P
+        self.innovation[rows] = innovation
+        return SOC
+
+    def std(self):
+        """各设备SOC估计的标准差(%)"""
+        return np.sqrt(self.P)
+
+    def to_dict(self):
+        """检查点：可直接json.dump"""
+        return {name: getattr(self, name).tolist()
+                for name in ('C_base', 'T', 'R_0', 'q', 'r', 'gate', 'SOC', 'P')}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['C_base'], 1.0, state['SOC'], state['P'], state['T'], state['R_0'],
+                   state['q'], state['r'], state.get('gate', DEFAULT_GATE))
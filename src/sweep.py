@@ -0,0 +1,178 @@
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pinformation import PInformation
+from discharge import DischargeModel, SCENES
+from parameters import _canonical
+import profiling
+
+SWEEP_AXES = ('chip', 'network', 'os', 'screen_size')
+
+
+def expand_grid(grid):
+    """
+    补全网格定义，未给出的轴取PInformation中的全部取值
+    grid: {'base': 基础规格, 'chips': [...], 'networks': [...], 'oses': [...],
+           'screen_sizes': [...]}
+    """
+    base = grid['base']
+    PIn = PInformation(base)
+    return {
+        'base': base,
+        'chips': list(grid.get('chips') or PIn.SOC_POWER_PROFILES),
+        'networks': list(grid.get('networks') or PIn.NETWORK_POWER),
+        'oses': list(grid.get('oses') or PIn.OS_FACTOR),
+        'screen_sizes': list(grid.get('screen_sizes') or [base['screen'].get('size', 6.1)]),
+    }
+
+
+def grid_size(grid):
+    return (len(grid['chips']) * len(grid['networks'])
+            * len(grid['oses']) * len(grid['screen_sizes']))
+
+
+def _grid_points(grid):
+    """按固定顺序枚举(序号, 网格点)"""
+    return enumerate(itertools.product(grid['chips'], grid['networks'], grid['oses'],
+                                       grid['screen_sizes']))
+
+
+def _chunks(grid, chunk_size, done):
+    """单个迭代器顺序切分网格，跳过全部已完成的分块，产出[(序号, 网格点)]"""
+    points = _grid_points(grid)
+    while True:
+        chunk = list(itertools.islice(points, chunk_size))
+        if not chunk:
+            return
+        if not all(index in done for index, _ in chunk):
+            yield chunk
+
+
+def grid_fingerprint(grid, **options):
+    """展开后的网格与计算参数的指纹，用于断点续跑时确认输出属于同一次扫描"""
+    return hashlib.sha1(repr(_canonical({'grid': grid, 'options': options}))
+                        .encode('utf-8')).hexdigest()
+
+
+def _point_spec(base, chip, network, os_name, screen_size):
+    spec = copy.deepcopy(base)
+    spec['chip'] = dict(spec.get('chip', {}), name=chip)
+    spec['network'] = dict(spec.get('network', {}), type=network)
+    spec['os'] = os_name
+    spec['screen'] = dict(spec.get('screen', {}), size=screen_size)
+    return spec
+
+
+def _run_chunk(base, points, scenes, T, SOC_0, threshold):
+    """工作进程：计算一个分块内所有网格点的功率与续航，points为[(序号, 网格点)]"""
+    records = []
+    for index, point in points:
+        model = DischargeModel(_point_spec(base, *point), scenes)
+        record = dict(zip(SWEEP_AXES, point))
+        record['index'] = index
+        record['retention'] = model.retention
+        record['power'] = {s: float(model.power[s]) for s in scenes}
+        record['runtime_h'] = {s: float(model.time_to_empty(s, SOC_0, T, threshold))
+                               for s in scenes}
+        records.append(record)
+    return records
+
+
+def _completed_indices(out_path):
+    """
+    读取已有输出中完成的网格点，并截掉中断时写了一半的末行
+    """
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        if line.strip():
+            done.add(json.loads(line)['index'])
+    return done
+
+
+def _check_fingerprint(out_path, fingerprint, restart):
+    """
+    输出旁的.grid文件记录扫描指纹：与本次不一致（或已有输出却没有指纹）时，
+    restart为True则清空输出重新开始，否则抛出ValueError
+    """
+    sidecar = out_path + '.grid'
+    stored = None
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding='utf-8') as f:
+            stored = f.read().strip()
+    has_output = os.path.exists(out_path) and os.path.getsize(out_path) > 0
+    if stored != fingerprint and (has_output or stored is not None):
+        if not restart:
+            raise ValueError(f"{out_path} holds results of a different sweep "
+                             f"(grid or options changed); use restart=True to overwrite it")
+        open(out_path, 'w').close()
+    with open(sidecar, 'w', encoding='utf-8') as f:
+        f.write(fingerprint)
+
+
+def run_sweep(grid, out_path, workers=None, chunk_size=64, scenes=SCENES,
+              T=298.15, SOC_0=100, threshold=1, restart=False):
+    """
+    并行参数扫描：网格按chunk_size分块交给进程池，结果完成一块写一块（JSONL）
+    再次运行同一out_path时跳过已完成的分块，实现断点续跑；
+    网格或计算参数变了时拒绝续跑（restart=True时清空重来）
+    调用方启用了profiling时，各工作进程的分阶段统计合并进当前统计
+    返回:
+        本次新写入的记录数
+    """
+    grid = expand_grid(grid)
+    scenes = list(scenes)
+    _check_fingerprint(out_path, grid_fingerprint(grid, scenes=scenes, T=T, SOC_0=SOC_0,
+                                                  threshold=threshold), restart)
+    done = _completed_indices(out_path)
+    written = 0
+    workers = workers or os.cpu_count()
+    stats = profiling.active()
+    task = profiling.wrap(_run_chunk, stats)
+    with open(out_path, 'a', encoding='utf-8') as out, ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        queue = _chunks(grid, chunk_size, done)
+        # 在途任务数有上限，避免一次提交整个网格
+        for points in itertools.islice(queue, 2 * workers):
+            pending.add(pool.submit(task, grid['base'], points, scenes, T, SOC_0, threshold))
+        while pending:
+            future = next(as_completed(pending))
+            pending.remove(future)
+            for record in profiling.unwrap(future.result(), stats):
+                if record['index'] not in done:
+                    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    written += 1
+            out.flush()
+            for points in itertools.islice(queue, 1):
+                pending.add(pool.submit(task, grid['base'], points, scenes, T, SOC_0, threshold))
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='芯片/屏幕/网络/系统参数扫描')
+    parser.add_argument('grid', help='网格定义JSON文件')
+    parser.add_argument('out', help='输出JSONL文件（已存在时断点续跑）')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--restart', action='store_true', help='网格与已有输出不一致时清空重来')
+    parser.add_argument('--profile', action='store_true', help='打印分阶段耗时统计')
+    args = parser.parse_args()
+    with open(args.grid, encoding='utf-8') as f:
+        grid = json.load(f)
+    if args.profile:
+        profiling.enable()
+    n = run_sweep(grid, args.out, workers=args.workers, chunk_size=args.chunk_size,
+                  restart=args.restart)
+    print(f"写入 {n} 条记录")
+    if args.profile:
+        print(profiling.disable().report())
@@ -0,0 +1,100 @@
+import numpy as np
+from discharge import FleetDischarge, SCENES, f_T_array
+from ocvcurve import voltage as voltage_array, f_SOC as f_SOC_array
+import profiling
+
+
+def thermal_step(T_dev, T_amb, P_base, coupling, R_th, C_th, dt):
+    """
+    集总热模型的一步隐式Euler
+        C_th·dT/dt = P(T) - (T - T_amb)/R_th
+        P(T) = P_base·(1 + k·(T - T_amb))，k = coupling / (R_th·P_base·(1 + coupling))
+    k的取法使稳态回到静态耦合模型：ΔT_ss = R_th·P_base·(1 + coupling)，P_ss = P_base·(1 + coupling)
+    方程对T线性，隐式一步有闭式解，任意dt下都单调趋于稳态
+    参数可为标量或可相互广播的数组
+    返回:
+        (新温度(K), 新温度下的总功率(W))
+    """
+    a = C_th / dt
+    dT = (a * (T_dev - T_amb) + P_base) / (a + 1 / (R_th * (1 + coupling)))
+    return T_amb + dT, P_base + coupling * dT / (R_th * (1 + coupling))
+
+
+class ThermalFleetDischarge(FleetDischarge):
+    """
+    电-热耦合的批量放电引擎：每条轨迹带一个集总温度状态
+    功率发热使机身升温，温度反馈到容量温度因子f_T和热耦合功率；
+    每步先隐式更新温度，再用新温度推进SOC（半隐式），大dt下保持稳定
+    simulate/simulate_to_file/crossings的T为环境温度
+    """
+
+    DEVICE_FIELDS = FleetDischarge.DEVICE_FIELDS + ('coupling', 'P_base', 'R_th', 'C_th')
+
+    def __init__(self, specs, scenes=SCENES):
+        super().__init__(specs, scenes)
+        self.coupling = np.array([[m.params['coupling'][sc] for sc in self.scenes]
+                                  for m in self.models])                        # (N, M)
+        self.P_base = self.power / (1 + self.coupling)                           # 不含热耦合的功率
+        self.R_th = np.array([m.params['thermal']['R_th'] for m in self.models])[:, None]
+        self.C_th = np.array([m.params['thermal']['C_th'] for m in self.models])[:, None]
+
+    def _coupled_steps(self, t, dt, SOC_0, T, T_0=None):
+        """
+        逐步产出(步号, 当前SOC, 当前机身温度)，两者均为原地更新的(N, M)数组
+        T_0: 初始机身温度，默认与环境温度T相同
+        """
+        n_steps = int(t / dt) + 1
+        shape = self.power.shape
+        SOC_curr = np.array(np.broadcast_to(SOC_0, shape), dtype=float)
+        T_amb = np.broadcast_to(np.asarray(T, dtype=float), shape)
+        T_dev = np.array(np.broadcast_to(T if T_0 is None else T_0, shape), dtype=float)
+        C_base = (self.capacity * self.retention)[:, None]
+        stats = profiling.active()
+        yield 0, SOC_curr, T_dev
+        if stats: stats.mark()
+        for i in range(1, n_steps):
+            T_dev[...], P = thermal_step(T_dev, T_amb, self.P_base, self.coupling,
+                                         self.R_th, self.C_th, dt)
+            if stats: stats.lap('thermal')
+            C_eff_mAh = C_base * f_T_array(T_dev) * f_SOC_array(SOC_curr)
+            if stats: stats.lap('capacity_integral')
+            I_mA = 1000 * P / voltage_array(SOC_curr)
+            if stats: stats.lap('current')
+            dSOC = -100 * (I_mA * dt / 3600) / C_eff_mAh
+            np.clip(SOC_curr + dSOC, 0, 100, out=SOC_curr)
+            if stats: stats.lap('step')
+            yield i, SOC_curr, T_dev
+            if stats: stats.lap('record')
+
+    def _steps(self, t, dt, SOC_0, T):
+        for i, SOC_curr, _ in self._coupled_steps(t, dt, SOC_0, T):
+            yield i, SOC_curr
+
+    def simulate_coupled(self, t, dt=600, SOC_0=100, T=298.15, T_0=None, dtype=np.float64,
+                         every=1):
+        """
+        同时记录SOC与机身温度
+        返回:
+            (soc, temperature)，均为(N, M, n_records)
+        """
+        shape = self.trajectory_shape(t, dt, every)
+        soc = np.empty(shape, dtype=dtype)
+        temperature = np.empty(shape, dtype=dtype)
+        for i, SOC_curr, T_dev in self._coupled_steps(t, dt, SOC_0, T, T_0):
+            if i % every == 0:
+                soc[..., i // every] = SOC_curr
+                temperature[..., i // every] = T_dev
+        return soc, temperature
+
+    def steady_temperature(self, T=298.15):
+        """各场景持续运行的稳态机身温度(K)，(N, M)"""
+        return T + self.R_th * self.power
+
+    def runtime(self, t=15 * 3600, dt=300, SOC_0=100, T=298.15, threshold=1, method='euler'):
+        """
+        续航时间（小时），(N, M)，在t内未放空的为nan
+        温度随时间变化，查表求解不再适用，只支持逐步推进
+        """
+        if method != 'euler':
+            raise ValueError(f"Unsupported integration method for coupled model: {method}")
+        return super().runtime(t, dt, SOC_0, T, threshold, method='euler')
@@ -0,0 +1,64 @@
+from collections import namedtuple
+import numpy as np
+from discharge import DischargeModel, SCENES, f_T_array
+from ocvcurve import runtime_integral, soc_from_runtime_integral
+
+# soc: (K, J+1) 各段边界处SOC(%)，补齐的空段保持不变
+# t_empty: (K,) SOC首次降到阈值的时刻(s)，未放空为nan
+TimelineResult = namedtuple('TimelineResult', ['soc', 't_empty', 'duration'])
+
+
+def _pad_timelines(timelines, scenes):
+    """把不等长的时间线补齐为(K, J)数组；空段时长为0"""
+    K = len(timelines)
+    J = max((len(tl) for tl in timelines), default=0)
+    scene_idx = np.zeros((K, J), dtype=int)
+    duration = np.zeros((K, J))
+    temp = np.full((K, J), 298.15)
+    index = {s: i for i, s in enumerate(scenes)}
+    for k, tl in enumerate(timelines):
+        for j, segment in enumerate(tl):
+            scene_idx[k, j] = index[segment[0]]
+            duration[k, j] = segment[1]
+            if len(segment) > 2:
+                temp[k, j] = segment[2]
+    return scene_idx, duration, temp
+
+
+def replay_timelines(models, timelines, SOC_0=100, threshold=1, scenes=SCENES):
+    """
+    批量回放混合场景的使用时间线
+    models: 单个DischargeModel/规格字典（所有时间线共用），或与timelines等长的列表
+    timelines: 每条为[(scene, duration_s, T), ...]，T可省略（默认298.15K）
+    每段内功率与温度恒定，段末SOC由runtime_integral的反函数精确给出，
+    所有时间线的第j段在一次向量运算中完成
+    返回:
+        TimelineResult
+    """
+    if isinstance(models, (DischargeModel, dict)):
+        models = [models] * len(timelines)
+    models = [m if isinstance(m, DischargeModel) else DischargeModel(m, scenes) for m in models]
+    scene_idx, duration, temp = _pad_timelines(timelines, scenes)
+    K, J = duration.shape
+
+    power = np.array([[m.power[s] for s in scenes] for m in models])     # (K, M)
+    P = np.take_along_axis(power, scene_idx, axis=1)                      # (K, J)
+    C_base = np.array([m.capacity * m.retention for m in models])[:, None] * f_T_array(temp)
+    rate = 100000 * P / (3600 * C_base)                                   # W每秒消耗量
+
+    soc = np.empty((K, J + 1))
+    soc[:, 0] = SOC_0
+    W = np.broadcast_to(runtime_integral(SOC_0), (K,)).astype(float)
+    W_thr = runtime_integral(threshold)
+    t = np.zeros(K)
+    t_empty = np.full(K, np.nan)
+    # 起始即不高于阈值：与DischargeModel.time_to_empty一致，放空时刻为起点
+    t_empty[W <= W_thr] = 0.0
+    for j in range(J):
+        W_next = np.maximum(W - rate[:, j] * duration[:, j], 0.0)
+        crossed = np.isnan(t_empty) & (W > W_thr) & (W_next <= W_thr)
+        t_empty[crossed] = t[crossed] + (W[crossed] - W_thr) / rate[crossed, j]
+        soc[:, j + 1] = soc_from_runtime_integral(W_next)
+        W = W_next
+        t += duration[:, j]
+    return TimelineResult(soc, t_empty, t)
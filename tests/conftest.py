@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 模块以src/为顶层（扁平导入）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
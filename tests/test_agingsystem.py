@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from agingsystem import Aging
+
+N = 4000
+
+
+def _mix(rng, low, high, edges):
+    """均匀随机值，其中约一半替换为阈值本身"""
+    values = rng.uniform(low, high, N)
+    pick = rng.random(N) < 0.5
+    values[pick] = rng.choice(np.asarray(edges, dtype=float), pick.sum())
+    return values
+
+
+@pytest.mark.parametrize('battery_type', ['Lipo', 'LiFePO4'])
+def test_capacity_degradation_array_matches_scalar(battery_type):
+    model = Aging(battery_type)
+    p = model.params
+    rng = np.random.default_rng(0)
+    age = _mix(rng, 0, 2000, [0, 1, 365])
+    cycles = _mix(rng, 0, 1500, [0, 1, p['cycle_life']])
+    soc = _mix(rng, 0, 1, [0, 0.5, p['stress_SOC_low'], p['stress_SOC_high'], 1])
+    temp = _mix(rng, 250, 330, [0, -5, p['stress_temp_low'], p['stress_temp_high'], p['T_ref']])
+    dod = _mix(rng, 0, 1, [0, 0.5, 0.8, 1])
+    expected = [model.capacity_degradation(*args) for args in zip(age, cycles, soc, temp, dod)]
+    actual = model.capacity_degradation_array(age, cycles, soc, temp, dod)
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-14)
+
+
+def test_stress_and_remaining_life_array_match_scalar():
+    model = Aging('Lipo')
+    rng = np.random.default_rng(1)
+    patterns = [{'avg_temp': t, 'avg_dod': d, 'storage_soc': s, 'fast_charge_ratio': f,
+                 'low_temp_charge': bool(c)}
+                for t, d, s, f, c in zip(_mix(rng, 280, 330, [303, 313]),
+                                         _mix(rng, 0, 1, [0.6, 0.8]),
+                                         _mix(rng, 0, 1, [0.9]),
+                                         _mix(rng, 0, 1, [0.7]),
+                                         rng.random(N) < 0.3)]
+    retention = _mix(rng, 0.4, 1, [0.6, 0.7, 0.8])
+    np.testing.assert_array_equal(model.stress_score_array(patterns),
+                                  [model.stress_score(p) for p in patterns])
+    np.testing.assert_allclose(
+        model.estimate_remaining_life_array(retention, patterns),
+        [model.estimate_remaining_life(r, p) for r, p in zip(retention, patterns)],
+        rtol=1e-12)
+
+    # 结构化数组输入与字典列表一致
+    fields = [(name, type(default)) for name, default in Aging.USAGE_FIELDS]
+    structured = np.array([tuple(p[name] for name, _ in fields) for p in patterns],
+                          dtype=[(name, 'f8' if t is float else '?') for name, t in fields])
+    np.testing.assert_array_equal(model.stress_score_array(structured),
+                                  model.stress_score_array(patterns))
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+import pytest
+from benchmark import check_import_budget
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def test_import_budget():
+    results = check_import_budget()
+    over = {m: f"{ms:.1f} ms > {limit} ms" for m, (ms, limit, ok) in results.items() if not ok}
+    assert not over
+
+
+@pytest.mark.parametrize('module', ['agingsystem', 'datacleaner', 'rainflow'])
+def test_import_does_not_load_heavy_dependencies(module):
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in ('numpy', 'pandas', 'scipy', 'sympy', 'matplotlib') "
+            f"if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         check=True, cwd=SRC)
+    assert out.stdout.strip() == ''
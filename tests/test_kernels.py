@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from agingsystem import Aging
+from kernels import aging_kernel
+
+pytest.importorskip('sympy')
+
+
+def test_aging_gradient_finite_for_fresh_battery():
+    kernel = aging_kernel()
+    value, grad = kernel.value_and_gradient(age_days=[0, 0, 30], cycles_completed=[0, 20, 0],
+                                            avg_SOC=0.5, avg_temp=298.15, DOD_avg=[0.5, 0.5, 0])
+    assert np.all(np.isfinite(value))
+    for name, g in grad.items():
+        assert np.all(np.isfinite(g)), name
+    assert value[0] == 1.0
+
+
+def test_aging_kernel_matches_array_path():
+    rng = np.random.default_rng(0)
+    n = 5000
+    fresh = rng.random((3, n)) < 0.1
+    args = dict(age_days=np.where(fresh[0], 0, rng.uniform(0, 1500, n)),
+                cycles_completed=np.where(fresh[1], 0, rng.uniform(0, 1000, n)),
+                avg_SOC=rng.uniform(0, 1, n), avg_temp=rng.uniform(260, 330, n),
+                DOD_avg=np.where(fresh[2], 0, rng.uniform(0, 1, n)))
+    expected = Aging('Lipo').capacity_degradation_array(*args.values())
+    np.testing.assert_allclose(aging_kernel()(**args), expected, atol=1e-12)
@@ -0,0 +1,50 @@
+import copy
+import json
+import pickle
+import pytest
+from batterymodel import specs
+from discharge import DischargeModel, FleetDischarge
+from parameters import PhoneParameterEstimator, _canonical
+
+
+def test_cached_params_are_read_only():
+    params = PhoneParameterEstimator.cached(specs)
+    with pytest.raises(TypeError):
+        params['coupling'] = {}
+    with pytest.raises(TypeError):
+        params['baseline']['P_s'] = 0
+
+
+def test_cached_params_copy_and_serialize():
+    params = PhoneParameterEstimator.cached(specs)
+    clone = copy.deepcopy(params)
+    clone['baseline']['P_s'] = 0
+    assert params['baseline']['P_s'] != 0
+    assert json.loads(json.dumps(params))['baseline']['P_s'] == params['baseline']['P_s']
+
+
+def test_models_pickle_round_trip():
+    model = DischargeModel(specs)
+    restored = pickle.loads(pickle.dumps(model))
+    assert restored.params == model.params
+    assert restored.time_to_empty('V') == model.time_to_empty('V')
+    with pytest.raises(TypeError):
+        restored.params['baseline']['P_s'] = 0
+
+    fleet = FleetDischarge([specs, specs])
+    assert (pickle.loads(pickle.dumps(fleet)).runtime() == fleet.runtime()).all()
+
+
+def test_canonical_numpy_values():
+    import numpy as np
+    from resultcache import result_key
+    a = np.linspace(0, 1, 2000)
+    b = a.copy()
+    b[1000] += 1e-12
+    spec_a = dict(specs, history={'dod_histogram': {'counts': a}})
+    spec_b = dict(specs, history={'dod_histogram': {'counts': b}})
+    assert result_key('retention', spec_a) != result_key('retention', spec_b)
+    assert result_key('retention', spec_a) == result_key('retention', dict(spec_a))
+    assert _canonical(np.float32(0.5)) == _canonical(0.5)
+    assert _canonical(np.int64(3)) == _canonical(3)
+    assert _canonical(np.float64(1.123456789012)) != _canonical(1.123456789)
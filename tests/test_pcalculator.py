@@ -0,0 +1,24 @@
+import numpy as np
+from pcalculator import calibrate_powers, solve_power_from_runtime
+
+
+def _runtimes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform([8, 5, 3, 5], [16, 12, 7, 12], (n, 4)), rng.uniform(3000, 5000, n)
+
+
+def test_batch_result_independent_of_batch_members():
+    runtimes, capacity = _runtimes(60)
+    batch = calibrate_powers(runtimes, capacity, 3.85)
+    assert batch.success.shape == (60,) and batch.success.all()
+    for i in range(0, 60, 7):
+        single = calibrate_powers(runtimes[i:i + 1], capacity[i], 3.85)
+        np.testing.assert_allclose(batch.powers[i], single.powers[0], atol=1e-7)
+        assert batch.cost[i] <= single.cost[0] * (1 + 1e-9) + 1e-15
+
+
+def test_single_phone_wrapper():
+    runtimes, capacity = _runtimes(1, seed=1)
+    powers = solve_power_from_runtime(*runtimes[0], battery_capacity=capacity[0],
+                                      voltage_avg=3.85)
+    assert powers is not None and powers.shape == (5,)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from rainflow import RainflowCounter
+
+# ASTM E1049-85 图6示例（载荷-2,1,-3,5,-1,3,-4,4,-2），放大10倍并平移到SOC(%)
+ASTM_SOC = [30, 60, 20, 100, 40, 80, 10, 90, 30]
+# 幅值(%) → 循环数：3→0.5、4→1.5、6→0.5、8→1.0、9→0.5
+ASTM_CYCLES = {30: 0.5, 40: 1.5, 60: 0.5, 80: 1.0, 90: 0.5}
+
+
+def _expected_counts(bins):
+    counts = np.zeros(bins)
+    for rng, n in ASTM_CYCLES.items():
+        counts[min(rng * bins // 100, bins - 1)] += n
+    return counts
+
+
+@pytest.mark.parametrize('bins', [10, 20])
+def test_astm_example_histogram(bins):
+    counter = RainflowCounter(bins)
+    counter.update(ASTM_SOC)
+    np.testing.assert_array_equal(counter.histogram()['counts'], _expected_counts(bins))
+
+
+def test_astm_example_streamed_in_chunks():
+    counter = RainflowCounter()
+    for chunk in ([30, 60], [20, 100, 40], [80], [10, 90, 30]):
+        counter.update(chunk)
+    summary = counter.summary()
+    assert summary['cycles'] == sum(ASTM_CYCLES.values())
+    expected = sum(rng * n for rng, n in ASTM_CYCLES.items()) / 100
+    assert summary['equivalent_full_cycles'] == pytest.approx(expected)
+    np.testing.assert_array_equal(counter.histogram()['counts'], _expected_counts(20))
+
+
+def test_ranges_on_bin_edges():
+    counter = RainflowCounter(20)
+    for rng in (15, 30, 35, 60, 70, 85, 95, 100):
+        counter._count(rng, 1.0)
+    assert np.flatnonzero(counter.counts).tolist() == [3, 6, 7, 12, 14, 17, 19]
+    assert counter.counts[19] == 2
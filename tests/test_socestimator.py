@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import ocvcurve
+from socestimator import SOCEstimator
+
+
+def _discharge(est, true, capacity, current, rng, ticks, dt=10):
+    for _ in range(ticks):
+        true = np.clip(true - 100 * current * dt / 3600 / (capacity * ocvcurve.f_SOC(true)), 0, 100)
+        volts = ocvcurve.voltage(true) - current / 1000 * 0.08 + rng.normal(0, 0.01, len(true))
+        est.update(current * rng.normal(1, 0.02, len(true)), volts, dt)
+    return true
+
+
+@pytest.mark.parametrize('SOC_0', [100, 50, 0])
+def test_converges_from_wrong_initial_soc(SOC_0):
+    rng = np.random.default_rng(0)
+    n = 300
+    capacity = rng.uniform(3000, 5000, n)
+    current = rng.uniform(200, 800, n)
+    true = rng.uniform(5, 99, n)
+    est = SOCEstimator(capacity, SOC_0=SOC_0)
+    true = _discharge(est, true, capacity, current, rng, 200)
+    err = est.SOC - true
+    assert np.sqrt(np.mean(err ** 2)) < 1.0
+    assert np.abs(err).max() < 10
+
+
+def test_leaves_full_charge_plateau():
+    # 初值100%：OCV跳变以上斜率为负，估计不能停在100%
+    rng = np.random.default_rng(1)
+    true = np.array([80.0, 50.0, 30.0])
+    est = SOCEstimator(np.full(3, 4000.0), SOC_0=100, P_0=0.25)
+    true = _discharge(est, true, np.full(3, 4000.0), np.full(3, 500.0), rng, 20)
+    np.testing.assert_allclose(est.SOC, true, atol=3)
+
+
+def test_soc_from_voltage_inverts_ocv():
+    SOC = np.r_[np.linspace(0, 94.9, 50), np.linspace(95, 100, 11)]
+    np.testing.assert_allclose(ocvcurve.soc_from_voltage(ocvcurve.voltage(SOC)), SOC, atol=1e-9)